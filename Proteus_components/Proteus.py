@@ -1,56 +1,188 @@
 #!/usr/bin/env python3
 
+import cProfile
+import os
+
 from ProteusArgManager import ProteusArgManager
+from ProteusCheckpoint import ProteusCheckpoint
+from ProteusConfig import ProteusConfig, ErrorMessages
 from ProteusHarvester import ProteusHarvester
+from ProteusIngest import ProteusIngest
+from ProteusIO import read_names
+from ProteusMetrics import ProteusMetrics, count_lines
 from ProteusPermutator import ProteusPermutator
+from ProteusPlanner import ProteusPlanner
 from ProteusResolver import ProteusResolver
+from ProteusResultStore import ProteusResultStore
+from ProteusRounds import ProteusRounds
+from ProteusState import ProteusRunState
+from ProteusWildcard import ProteusWildcardDetector
+from ProteusWordStats import ProteusWordStats
 
 
 def main():
     arg_manager = ProteusArgManager()
     config = arg_manager.parse()
 
+    metrics = ProteusMetrics(config)
+    profiler = cProfile.Profile() if config.profileFile is not None else None
+    try:
+        if profiler is not None:
+            profiler.runcall(run, config, metrics)
+        else:
+            run(config, metrics)
+    finally:
+        # written even if the run failed, the stages that did complete are still useful
+        metrics.write()
+        if profiler is not None:
+            profiler.dump_stats(config.profileFile)
+            if not config.silent:
+                print(f"wrote profile to {config.profileFile}, inspect it with: python -m pstats {config.profileFile}")
+
+
+def run(config: ProteusConfig, metrics: ProteusMetrics):
     if not config.silent:
         print("starting proteus")
 
+    checkpoint = ProteusCheckpoint(config) if config.checkpointFile is not None else None
+
+    # the input is read once, for both the harvester and the permutator
+    ingest = ProteusIngest(config)
+    with metrics.stage("ingest") as stage:
+        ingest.ingest()
+        stage.items_in = ingest.line_count
+        stage.items_out = len(ingest.domains)
+
     if config.harvest:
         if not config.silent:
             print("harvesting words")
         harvester = ProteusHarvester(config)
-        harvester.harvest()
-        harvester.write_harvest_ranking()
+        with metrics.stage("harvest") as stage:
+            harvester.harvest(ingest)
+            harvester.write_harvest_ranking()
+            stage.items_in = harvester.domain_count
+            stage.items_out = len(harvester.harvestCounter)
     
     if not config.silent:
         print("permutating domains")
     permutator = ProteusPermutator(config)
-    if config.harvest:
-        permutator.build_permutator_set(harvester.get_harvested_words())
-    else:
-        permutator.build_permutator_set()
-    permutator.read_input_domains()
-    if config.lowRamMode:
-        permutator.lr_permutate_simple_actions()
-        permutator.lr_permutate_insertion()
-        permutator.lr_permutate_append_hyphenate()
-        permutator.dedup_lr_buffer()
+    with metrics.stage("build_permutator_set") as stage:
+        if config.harvest:
+            permutator.build_permutator_set(harvester.get_harvested_words())
+            permutator.harvest_counts = harvester.harvestCounter
+        else:
+            permutator.build_permutator_set()
+        stage.items_out = len(permutator.permutators)
+    permutator.read_input_domains(ingest)
+
+    if config.stateFile is not None and os.path.exists(config.stateFile):
+        try:
+            permutator.previous_state = ProteusRunState.load(config.stateFile)
+        except (OSError, ValueError, KeyError) as e:
+            raise ValueError(ErrorMessages.STATE_FILE_INVALID.format(f"{config.stateFile} ({e})"))
+
+    # the plan gives the exact amount of candidates of every strategy, which the progress line uses for its ETA
+    word_stats = ProteusWordStats(config.wordStatsFile, permutator.explain, config) if config.wordStatsFile is not None else None
+    if word_stats is not None and config.wordTrimRate is not None:
+        permutator.trimmed = word_stats.trimmed(permutator.permutators, config.permutationStrategy, config.wordTrimRate, config.wordTrimMinAttempts)
+        if not config.silent:
+            trimmed = ", ".join(f"{strategy}: {len(words)}" for strategy, words in permutator.trimmed.items()) or "none"
+            print(f"words below a hit rate of {config.wordTrimRate} in {config.wordStatsFile} are {'tried last' if config.ranked else 'left out'} ({trimmed})")
+
+    planner = ProteusPlanner(config)
+    planner.plan(permutator.input_domains, permutator.permutators, None if config.ranked else permutator.trimmed) # ranking only deprioritizes them
+    if config.plan:
+        if permutator.previous_state is not None:
+            print(f"the state file {config.stateFile} exists, so only the delta against the earlier run is generated. The plan below is the full run")
+        planner.print_plan()
+        return
+    if permutator.previous_state is None: # the plan counts the full run, not the delta
+        metrics.expected.update(planner.counts)
+
+    store = ProteusResultStore(config.resultsFile, config) if config.resultsFile is not None and config.resolve else None
+
+    wildcard_detector = None
+    if config.wildcardFilter and config.resolve:
+        if not config.silent:
+            print("detecting wildcard zones")
+        wildcard_detector = ProteusWildcardDetector(config)
+        with metrics.stage("wildcard_detection") as stage:
+            zones = wildcard_detector.parent_zones(permutator.input_domains)
+            wildcard_detector.detect(zones)
+            stage.items_in = len(zones)
+            stage.items_out = len(wildcard_detector.wildcards)
+        permutator.wildcards = wildcard_detector
+
+    if metrics.enabled:
+        permutator.metrics = metrics
+    if config.pipeline and config.resolve:
+        if not config.silent:
+            print("resolving generated domains while permutating")
+        resolver = ProteusResolver(config, store=store, word_stats=word_stats)
+        with metrics.stage("resolve") as stage:
+            resolver.resolve_stream(permutator.stream_generated_domains())
+            stage.items_out = count_lines(config.resolverOutput)
     else:
-        permutator.permutate_simple_actions()
-        permutator.permutate_insertion()
-        permutator.permutate_append_hyphenate()
-        permutator.write_generated_domains()
+        with metrics.stage("permutate", len(permutator.input_domains)) as stage:
+            permutator.write_generated_domains(checkpoint)
+            stage.items_out = permutator.generated_count
 
-    if config.resolve:
+    # a delta run can have nothing new to resolve
+    if config.resolve and not config.pipeline and permutator.generated_count == 0:
+        if not config.silent:
+            print("no domains were generated, skipping resolving")
+        open(config.resolverOutput, "w").close()
+    elif config.resolve and not config.pipeline:
         if not config.silent:
             print("resolving generated domains")
-        resolver = ProteusResolver(config)
-        resolver.print_resolve_time()
-        if config.lowRamMode:
-            resolver.lr_resolve()
-        else:
-            resolver.resolve()
+        resolver = ProteusResolver(config, checkpoint, store, word_stats)
+        resolver.print_resolve_time(permutator.generated_count)
+        with metrics.stage("resolve", permutator.generated_count) as stage:
+            if config.hierarchical:
+                resolver.hierarchical_resolve(permutator.input_domains)
+            elif config.lowRamMode or checkpoint is not None:
+                resolver.lr_resolve()
+            else:
+                resolver.resolve()
+            stage.items_out = count_lines(config.resolverOutput)
+
+    if wildcard_detector is not None:
+        with metrics.stage("wildcard_filter") as stage:
+            stage.items_in = count_lines(config.resolverOutput)
+            wildcard_detector.filter_results()
+            stage.items_out = count_lines(config.resolverOutput)
+
+    if config.rounds > 1:
+        ProteusRounds(config, permutator, metrics, wildcard_detector, store, word_stats).run()
+
+    # the store receives the final results of the run, after wildcard filtering and every round
+    if store is not None:
+        with metrics.stage("result_store") as stage:
+            stage.items_out = store.commit_run(read_names(config.resolverOutput, config.writeBufferSize), permutator.explain)
+        if not config.silent:
+            print(f"stored {stage.items_out} resolved domain(s) in {config.resultsFile} as run {store.run_id}")
+        store.close()
+
+    if word_stats is not None and config.resolve:
+        hits = word_stats.record_hits(read_names(config.resolverOutput, config.writeBufferSize))
+        word_stats.save()
+        if not config.silent:
+            print(f"updated the hit rates of the words in {config.wordStatsFile} with {hits} hit(s)")
+    if word_stats is not None:
+        word_stats.close()
+
+    if config.stateFile is not None:
+        permutator.run_state().save(config.stateFile)
+        if not config.silent:
+            print(f"saved the run state to {config.stateFile}")
+
+    # the run completed, so there is nothing left to resume
+    if checkpoint is not None:
+        checkpoint.clear()
     
     if not config.silent:
         print("proteus completed")
+
     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,160 @@
+import dataclasses
+import os
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Iterable, Iterator, Optional
+
+from ProteusAsyncResolver import ProteusAsyncResolver, ProteusDNSResult
+from ProteusConfig import ProteusConfig
+from ProteusDeduplicator import ProteusDeduplicator
+from ProteusIngest import DOMAIN_BYTES
+from ProteusPermutator import ProteusPermutator
+
+
+STRATEGIES = ["simple", "hyphenate", "insert", "append-hyphenate"]
+
+
+# Importable streaming API. Every stage takes iterables and returns iterators, nothing is read from or written to fixed files
+# (the deduplication of the permutations keeps the unique candidates in memory, or a bloom filter of the memory budget with the
+# bloom backend). An API object keeps the baselist and the results of earlier resolutions in memory, so a long-running process
+# (like ProteusDaemon) does not reload them for every target.
+# Resolving always uses the native resolver, as it is the only backend that runs in-process. Safe to use from multiple threads
+class ProteusAPI:
+    def __init__(self, config: Optional[ProteusConfig] = None):
+        # a copy, so resolving the default baselist does not change the config of the caller
+        self.config = dataclasses.replace(config) if config is not None else ProteusConfig(file="-", silent=True)
+        if self.config.useBaselist and self.config.baselist == "default":
+            self.config.baselist = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselists", "default_baselist.txt")
+        self.result_cache_size = 1000000    # resolutions kept in memory, the oldest are dropped first
+        self.result_cache: OrderedDict[str, tuple[float, ProteusDNSResult]] = OrderedDict()
+        self.uncacheable = ("TIMEOUT", "SERVFAIL", "REFUSED")   # failures say nothing about the name, so they are not cached
+        self.lock = threading.Lock()
+        self._baselist: Optional[list[str]] = None
+
+    # The baselist words in baselist order, loaded once
+    def baselist(self) -> list[str]:
+        with self.lock:
+            if self._baselist is None:
+                self._baselist = []
+                if self.config.useBaselist:
+                    with open(self.config.baselist, "r") as bl:
+                        self._baselist = list(dict.fromkeys(w.strip().lower() for w in bl if w.strip()))
+            return self._baselist
+
+    # Yields the valid domains (lowered, stripped, only allowed characters), with the same validation as the file input
+    @staticmethod
+    def valid_domains(domains: Iterable[str]) -> Iterator[str]:
+        for domain in domains:
+            domain = domain.strip().lower()
+            raw = domain.encode("ascii", "replace")
+            if raw and not raw.translate(None, DOMAIN_BYTES):
+                yield domain
+
+    # The labels of the domains ranked by how often they appear, limited to max_words (maxHarvestedWords if not set).
+    # Ranking needs every domain, so this is the only stage that consumes its whole input before returning
+    def harvest(self, domains: Iterable[str], max_words: Optional[int] = None) -> list[tuple[str, int]]:
+        counts = Counter()
+        for domain in self.valid_domains(domains):
+            counts.update(label for label in domain.split(".") if label)
+        return counts.most_common(max_words if max_words is not None else self.config.maxHarvestedWords)
+
+    # Yields the unique candidates of the domains as they are generated. Without words, the baselist and the words harvested from the domains are
+    # used, like a run of the script. Strategies default to those of the config, "all" selects every strategy
+    def permutations(self, domains: Iterable[str], words: Optional[Iterable[str]] = None, strategies: Optional[list[str]] = None) -> Iterator[str]:
+        domains = list(dict.fromkeys(self.valid_domains(domains)))
+        strategies = list(strategies) if strategies is not None else list(self.config.permutationStrategy or ["simple"])
+        if "all" in strategies:
+            strategies = list(STRATEGIES)
+        for strategy in strategies:
+            if strategy not in STRATEGIES:
+                raise ValueError(f"unknown permutation strategy: {strategy}")
+
+        permutator = ProteusPermutator(dataclasses.replace(self.config, permutationStrategy=strategies))
+        permutator.input_domains = set(domains)
+        if words is None:
+            permutator.permutators = set(self.baselist())
+            if self.config.harvest:
+                harvested = [word for word, _ in self.harvest(domains, None) if word not in permutator.permutators]
+                permutator.permutators.update(harvested[:self.config.maxHarvestedWords])
+        else:
+            permutator.permutators = {w.strip().lower() for w in words if w.strip()}
+        if not permutator.permutators:
+            return iter(())
+        return ProteusDeduplicator(self.config).stream(permutator.permutate(domains))
+
+    # Yields the result of every name (see ProteusDNSResult) as soon as it is available, in the order the answers arrive.
+    # Names resolved within the cache TTLs are answered from memory. The resolver runs in a separate thread, and pauses
+    # when results are not consumed
+    def resolve(self, names: Iterable[str], only_resolved: bool = False) -> Iterator[ProteusDNSResult]:
+        results = queue.Queue(maxsize=65536)
+        stop = threading.Event()
+        done = object()
+        errors = []
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def uncached(names):
+            for name in names:
+                if stop.is_set():
+                    return
+                cached = self._cached(name)
+                if cached is None:
+                    yield name
+                else:
+                    put(cached)
+
+        def answered(result: ProteusDNSResult):
+            self._store(result)
+            put(result)
+
+        def run():
+            try:
+                ProteusAsyncResolver(self.config).resolve_names(uncached(self.valid_domains(names)), answered)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put(done)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                if not only_resolved or item.resolved:
+                    yield item
+        finally:
+            stop.set()
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def _cached(self, name: str) -> Optional[ProteusDNSResult]:
+        with self.lock:
+            entry = self.result_cache.get(name)
+            if entry is None:
+                return None
+            expires, result = entry
+            if expires <= time.monotonic():
+                del self.result_cache[name]
+                return None
+            return result
+
+    def _store(self, result: ProteusDNSResult):
+        if result.status in self.uncacheable:
+            return
+        ttl = self.config.cacheTTL if result.resolved else self.config.cacheNegativeTTL
+        with self.lock:
+            self.result_cache[result.name] = (time.monotonic() + ttl, result)
+            self.result_cache.move_to_end(result.name)
+            while len(self.result_cache) > self.result_cache_size:
+                self.result_cache.popitem(last=False)
@@ -1,13 +1,14 @@
 import argparse
 import os
 
+from ProteusIO import file_format, zstandard
 from ProteusConfig import ProteusConfig, ErrorMessages
 
 
 class ProteusArgManager:
     def __init__(self):
         self.parser = argparse.ArgumentParser(description="Proteus is a subdomain permutator and resolver. Developed by Far Horizon (farhorizon.dev)",
-                                              epilog="\n!!!!!\nI recommend calculating the total generated permutations in advance, as a large number of permutations can take hours or even days to resolve. The default baselist has 150 entries.\n\nThe amount of permutations can be calculated with (baselist length + harvested words)* known domains\n!!!!!")
+                                              epilog="\n!!!!!\nI recommend calculating the total generated permutations in advance, as a large number of permutations can take hours or even days to resolve. The default baselist has 150 entries.\n\nThe amount of permutations of every strategy, the size of the output, the peak memory and the resolve time can be calculated in advance with --plan\n!!!!!")
         self._configure_arguments()
     
     def _configure_arguments(self):
@@ -16,7 +17,8 @@ class ProteusArgManager:
             "-f", "--file",
             required=True,
             type=str,
-            help="set the file containing target subdomains. Currently only accepts .txt files [REQUIRED]"
+            nargs="+",
+            help="set the file(s) containing target subdomains. Currently only accepts .txt files, use - to read the subdomains from stdin [REQUIRED]"
         )
         self.parser.add_argument(
             "-b", "--baselist",
@@ -45,6 +47,58 @@ class ProteusArgManager:
             help="disable harvesting of domain parts. The permutator will only use the words from the baselist [DEFAULT: enabled]"
         )
 
+        self.parser.add_argument(
+            "--plan",
+            action='store_true',
+            help="dry run: print the amount of candidates every strategy generates, the size of the output, the projected peak memory and resolve time, then exit without generating, writing or resolving anything [DEFAULT: False]"
+        )
+        self.parser.add_argument(
+            "--ranked",
+            action='store_true',
+            help="generate the candidates best-first, scored by the baselist position and harvest frequency of the word and the amount of known domains in the zone of the candidate. Ranked generation does not use workers. Duplicates are filtered in memory, so without --max-queries memory grows with the amount of unique generated domains, unless low-ram mode is enabled, which filters them with a bloom filter of the memory budget instead [DEFAULT: False]"
+        )
+        self.parser.add_argument(
+            "--max-queries",
+            type=int,
+            default=None,
+            help="set a budget of unique candidates. Generation stops once the budget is spent, so only the best candidates are resolved. Enables ranked generation [DEFAULT: unlimited]"
+        )
+        self.parser.add_argument(
+            "--shard",
+            type=str,
+            default=None,
+            help="only generate and resolve shard i of N of the candidate space, set as i/N (for example 2/4). Candidates are assigned to shards by a hash of their name, so nodes running the same command with a different shard split the work evenly without any coordination, and never query the same name. Combine the outputs of all nodes with ProteusMerge.py. --max-queries applies per shard [DEFAULT: disabled]"
+        )
+        self.parser.add_argument(
+            "--rounds",
+            type=int,
+            default=1,
+            help="set the amount of feedback rounds. Every round after the first permutates the newly resolved domains of the previous round with all words, and the known domains with the words newly harvested from them. Names are never queried twice, and every round writes its own .roundN files. Stops early once a round resolves nothing new [DEFAULT: 1]"
+        )
+        self.parser.add_argument(
+            "--state",
+            type=str,
+            default=None,
+            help="set a run-state file. If it exists, only the delta against the earlier run is generated: new domains with all words, all domains with new words, and new strategies. A snapshot of this run is saved to it once the run completes [DEFAULT: disabled]"
+        )
+        self.parser.add_argument(
+            "-w", "--workers",
+            type=int,
+            default=1,
+            help="set the amount of worker processes used for permutating. The input domains are split into shards that are permutated in parallel and merged at the end. Not used in pipeline mode, and the memory budget is shared between the workers [DEFAULT: 1]"
+        )
+        self.parser.add_argument(
+            "--pipeline",
+            action='store_true',
+            help="resolve generated domains while they are still being generated, instead of waiting for the permutator to finish. Duplicates are filtered in memory, so memory grows with the amount of unique generated domains [DEFAULT: False]"
+        )
+        self.parser.add_argument(
+            "--no-permutator-output",
+            dest="writeGenerated",
+            action='store_false',
+            help="do not write the generated domains to the permutator output file. Only possible in pipeline mode [DEFAULT: enabled]"
+        )
+
         # Rate-limiting
         self.parser.add_argument(
             "-tr", "--threads-resolver",
@@ -59,6 +113,66 @@ class ProteusArgManager:
             help="set a rate limit for the resolver (dnsx). Any negative value will be interpreted as unlimited. Note that rates over 300 may lead to rate-limiting [DEFAULT: 200]"
         )
 
+        # Resolver
+        self.parser.add_argument(
+            "--resolver-backend",
+            type=str,
+            default="dnsx",
+            choices=["dnsx", "massdns", "native"],
+            help="set the resolver used to resolve generated domains. dnsx runs the external dnsx binary, massdns runs the external massdns binary on the resolver pool (the thread count is used as the amount of lookups in flight, massdns has no rate limit), native uses the built-in asyncio resolver (the thread count is used as the amount of queries in flight) [DEFAULT: dnsx]"
+        )
+        self.parser.add_argument(
+            "--wildcard-filter",
+            action='store_true',
+            help="probe every parent zone of the input domains with random labels to detect wildcard DNS. Candidates below wildcard zones are skipped, and resolved domains that only return wildcard answers are removed from the results. Probing always uses the native resolver [DEFAULT: False]"
+        )
+        self.parser.add_argument(
+            "-r", "--resolvers",
+            type=str,
+            default=None,
+            help="set a file containing the resolvers used by the native and massdns resolvers, one ip (or ip:port) per line [DEFAULT: public resolvers of cloudflare, google and quad9]"
+        )
+        self.parser.add_argument(
+            "--resolver-workers",
+            type=int,
+            default=1,
+            help="set the amount of resolver cycles that run concurrently in low-ram mode. The rate limit and threads are divided between the cycles, and the size of the cycles is adapted to the available memory [DEFAULT: 1]"
+        )
+        self.parser.add_argument(
+            "--resolver-timeout",
+            type=float,
+            default=2.0,
+            help="set the timeout in seconds of a single query of the native resolver [DEFAULT: 2.0]"
+        )
+        self.parser.add_argument(
+            "--resolver-retries",
+            type=int,
+            default=2,
+            help="set the amount of times the native and massdns resolvers retry a query that timed out or failed [DEFAULT: 2]"
+        )
+        self.parser.add_argument(
+            "--hierarchical",
+            action='store_true',
+            help="resolve the generated domains level by level, shallowest first. Candidates below a name that got an NXDOMAIN answer are skipped, as nothing exists below a name that does not exist (RFC 8020). Cuts the queries for deep inputs with the insert and append-hyphenate strategies, but misses names below resolvers that answer NXDOMAIN for names that do have subdomains. Requires the native or massdns backend [DEFAULT: False]"
+        )
+        self.parser.add_argument(
+            "--adaptive-rate",
+            action='store_true',
+            help="let the native resolver adapt its rate while resolving. The rate starts at the set resolver rate, is lowered when more than 2%% of the queries time out or get a SERVFAIL or REFUSED answer, and is raised slowly otherwise, within the min and max rate [DEFAULT: False]"
+        )
+        self.parser.add_argument(
+            "--min-rate",
+            type=int,
+            default=20,
+            help="set the lowest rate the adaptive rate control goes down to [DEFAULT: 20]"
+        )
+        self.parser.add_argument(
+            "--max-rate",
+            type=int,
+            default=1000,
+            help="set the highest rate the adaptive rate control goes up to. An unlimited resolver rate starts at this rate [DEFAULT: 1000]"
+        )
+
         # Behavior
         self.parser.add_argument(
             "-mhw","--max-harvested-words",
@@ -79,7 +193,26 @@ class ProteusArgManager:
         self.parser.add_argument(
             "--low-ram-mode",
             action='store_true',
-            help="large lists of generated domains can cause issues when loaded into dnsx on small machines (like a 1vcpu/1gb ram VPS). This mode splits the list into parts and runs multiple, smaller dnsx cycles to solve this issue. This mode is slightly slower than the standard mode, but will allow for larger sets of data (currently not implemented) [DEFAULT: False]"
+            help="keep memory use low on small machines (like a 1vcpu/1gb ram VPS). Deduplicating the generated domains uses a memory budget of 64 MB instead of 512 MB (unless set with -mb), and backends that load the full list (dnsx) resolve it in split cycles sized to the available memory, which can run concurrently with --resolver-workers. The streaming backends (native, massdns) never load the full list and resolve it in one pass. Slightly slower than the standard mode, but handles much larger sets of data [DEFAULT: False]"
+        )
+        self.parser.add_argument(
+            "-mb", "--memory-budget",
+            type=int,
+            default=None,
+            help="set the amount of memory (in MB) the permutator may use for deduplicating generated domains. Once the budget is reached, sorted parts are spilled to disk and merged at the end [DEFAULT: 512, 64 in low-ram mode]"
+        )
+        self.parser.add_argument(
+            "--dedup-backend",
+            type=str,
+            default="sort",
+            choices=["sort", "partition", "bloom"],
+            help="set how generated domains are deduplicated. sort (exact, spills sorted runs to disk once the memory budget is reached), partition (exact, hash-partitions the domains over files on disk), bloom (a bloom filter of the memory budget, drops a fraction of the domains set by the false positive rate, but also keeps pipeline mode within the budget). Parallel and checkpointed permutation always sort their shards [DEFAULT: sort]"
+        )
+        self.parser.add_argument(
+            "--dedup-fp-rate",
+            type=float,
+            default=0.0001,
+            help="set the false positive rate of the bloom dedup backend. Lower rates use more hashes, and fit fewer domains into the memory budget [DEFAULT: 0.0001]"
         )
 
         # permutation strategies (not implemented yet)
@@ -92,6 +225,87 @@ class ProteusArgManager:
             help="Set the permutation strategy to use. options:\nsimple (prepend the permutator to the domain, seperated by a .)\nhyphenate (prepend the permutator to the domain, separated by a -)\ninsert (insert the permutator between parts of known domains)\nall (a mix of the afformentioned strategies. Be warned: even a small list with this strategy will lead to large amount of generated domains) [DEFAULT: simple]" 
         )
 
+        # Resolution cache
+        self.parser.add_argument(
+            "-c", "--cache",
+            type=str,
+            default=None,
+            help="set a persistent resolution cache file (SQLite) shared across runs. Domains with a fresh entry in the cache are not resolved again [DEFAULT: disabled]"
+        )
+        self.parser.add_argument(
+            "--cache-ttl",
+            type=int,
+            default=604800,
+            help="set the amount of seconds a resolved domain stays fresh in the cache [DEFAULT: 604800 (7 days)]"
+        )
+        self.parser.add_argument(
+            "--cache-negative-ttl",
+            type=int,
+            default=86400,
+            help="set the amount of seconds a domain that did not resolve stays fresh in the cache [DEFAULT: 86400 (1 day)]"
+        )
+        self.parser.add_argument(
+            "--cache-max-entries",
+            type=int,
+            default=20000000,
+            help="set the maximum amount of entries in the cache. Expired entries are removed after every run, and if the cache is still too large the oldest entries are removed [DEFAULT: 20000000]"
+        )
+
+        # Result store
+        self.parser.add_argument(
+            "--results-db",
+            type=str,
+            default=None,
+            help="set an indexed result store file (SQLite) shared across runs. Every resolved domain is stored once with its A and CNAME records, the word, strategy and domain that generated it, and the runs that found it. Query it with ProteusResultStore.py [DEFAULT: disabled]"
+        )
+
+        # Word statistics
+        self.parser.add_argument(
+            "--word-stats",
+            type=str,
+            default=None,
+            help="set a word statistics file (SQLite) shared across runs, keeping the hit rate of every word per strategy. Every queried domain counts as an attempt of the word that generated it, and every result as a hit. Inspect it with ProteusWordStats.py [DEFAULT: disabled]"
+        )
+        self.parser.add_argument(
+            "--trim-words",
+            type=float,
+            default=None,
+            help="leave out the words whose hit rate with a strategy is below this rate (between 0 and 1) in the word statistics. With --ranked the words are tried last instead of left out [DEFAULT: disabled]"
+        )
+        self.parser.add_argument(
+            "--trim-min-attempts",
+            type=int,
+            default=1000,
+            help="set the amount of attempts a word needs with a strategy before it can be trimmed [DEFAULT: 1000]"
+        )
+
+        # Checkpointing
+        self.parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default=None,
+            help="set a checkpoint manifest file. Permutation and resolving are done in chunks, and every completed chunk is recorded in the manifest. Resolving always uses the low-ram split cycles when checkpointing [DEFAULT: disabled, proteus_checkpoint.json when resuming]"
+        )
+        self.parser.add_argument(
+            "--resume",
+            action='store_true',
+            help="resume an earlier run from its checkpoint manifest, skipping all completed chunks. Use the same arguments as the earlier run [DEFAULT: False]"
+        )
+
+        # Instrumentation
+        self.parser.add_argument(
+            "--stats-json",
+            type=str,
+            default=None,
+            help="set a file to write the metrics of every stage to as JSON: wall time, CPU time, peak RSS, items in and out and rate [DEFAULT: disabled]"
+        )
+        self.parser.add_argument(
+            "--profile",
+            type=str,
+            default=None,
+            help="set a file to write a cProfile profile of the run to. Inspect it with python -m pstats <file> [DEFAULT: disabled]"
+        )
+
         # Outputs
         self.parser.add_argument(
             "-ro", "--resolver-output",
@@ -109,7 +323,7 @@ class ProteusArgManager:
             "-go", "--permutator-output",
             type=str,
             default="generated_domains.txt",
-            help="set the output for the permutator. This file contains all of the domains generated by the permutator, including those that don't resolve [DEFAULT: generated_domains.txt]"
+            help="set the output for the permutator. This file contains all of the domains generated by the permutator, including those that don't resolve. A name ending in .gz or .zst is compressed while writing (.zst requires the zstandard package), a name ending in .pfc is written in a compact binary format that can be compressed as well (.pfc.gz) [DEFAULT: generated_domains.txt]"
         )
 
         # Dangerous arguments
@@ -122,7 +336,8 @@ class ProteusArgManager:
     def parse(self):
         args = self.parser.parse_args()
         config = ProteusConfig(
-            file=args.file,
+            file=args.file[0],
+            inputFiles=args.file,
             baselist=args.baselist,
             threadsResolver=args.threads_resolver,
             rateResolver=args.rate_resolver,
@@ -137,19 +352,62 @@ class ProteusArgManager:
             resolverOutput=args.resolver_output,
             permutatorOutput=args.permutator_output,
             permutationStrategy=args.permutation_strategy,
-            lowRamMode=args.low_ram_mode
+            lowRamMode=args.low_ram_mode,
+            plan=args.plan,
+            rounds=args.rounds,
+            stateFile=args.state,
+            ranked=args.ranked or args.max_queries is not None,
+            maxQueries=args.max_queries,
+            workers=args.workers,
+            pipeline=args.pipeline,
+            dedupBackend=args.dedup_backend,
+            dedupFalsePositiveRate=args.dedup_fp_rate,
+            writeGenerated=args.writeGenerated,
+            wildcardFilter=args.wildcard_filter,
+            cacheFile=args.cache,
+            cacheTTL=args.cache_ttl,
+            cacheNegativeTTL=args.cache_negative_ttl,
+            cacheMaxEntries=args.cache_max_entries,
+            resultsFile=args.results_db,
+            wordStatsFile=args.word_stats,
+            wordTrimRate=args.trim_words,
+            wordTrimMinAttempts=args.trim_min_attempts,
+            checkpointFile=args.checkpoint,
+            resume=args.resume,
+            resolverWorkers=args.resolver_workers,
+            resolverBackend=args.resolver_backend,
+            resolverTimeout=args.resolver_timeout,
+            resolverRetries=args.resolver_retries,
+            hierarchical=args.hierarchical,
+            adaptiveRate=args.adaptive_rate,
+            minRateResolver=args.min_rate,
+            maxRateResolver=args.max_rate,
+            statsFile=args.stats_json,
+            profileFile=args.profile
         )
 
-        # normalize input file path
-        config.file = os.path.abspath(os.path.expanduser(config.file))
+        # set the memory budget based on the ram mode if none is set
+        if args.memory_budget is not None:
+            config.memoryBudget = args.memory_budget
+        elif config.lowRamMode:
+            config.memoryBudget = 64
+
+        # normalize input file paths, - is stdin
+        config.inputFiles = [f if f == "-" else os.path.abspath(os.path.expanduser(f)) for f in config.inputFiles]
+        config.file = config.inputFiles[0]
 
         # Target file checks
-        if not os.path.exists(config.file):
-            self.parser.error(ErrorMessages.TARGET_FILE_DOES_NOT_EXIST.format(config.file))
-        if not os.path.isfile(config.file) or not (config.file.lower().endswith(".txt")):
-            self.parser.error(ErrorMessages.TARGET_FILE_INVALID.format(config.file))
-        if os.path.getsize(config.file) == 0:
-            self.parser.error(ErrorMessages.TARGET_FILE_EMPTY.format(config.file))
+        if config.inputFiles.count("-") > 1:
+            self.parser.error(ErrorMessages.STDIN_MULTIPLE_TIMES)
+        for target in config.inputFiles:
+            if target == "-":
+                continue
+            if not os.path.exists(target):
+                self.parser.error(ErrorMessages.TARGET_FILE_DOES_NOT_EXIST.format(target))
+            if not os.path.isfile(target) or not (target.lower().endswith(".txt")):
+                self.parser.error(ErrorMessages.TARGET_FILE_INVALID.format(target))
+            if os.path.getsize(target) == 0:
+                self.parser.error(ErrorMessages.TARGET_FILE_EMPTY.format(target))
         
         # set the path to the default baselist if default is chosen
         if config.useBaselist and config.baselist == "default":
@@ -173,7 +431,26 @@ class ProteusArgManager:
         config.harvesterOutput = os.path.abspath(os.path.expanduser(config.harvesterOutput))
         config.resolverOutput = os.path.abspath(os.path.expanduser(config.resolverOutput))
         config.permutatorOutput = os.path.abspath(os.path.expanduser(config.permutatorOutput))
+        if config.checkpointFile is None and config.resume:
+            config.checkpointFile = "proteus_checkpoint.json"
+        if config.checkpointFile is not None:
+            config.checkpointFile = os.path.abspath(os.path.expanduser(config.checkpointFile))
+        if config.cacheFile is not None:
+            config.cacheFile = os.path.abspath(os.path.expanduser(config.cacheFile))
+        if config.resultsFile is not None:
+            config.resultsFile = os.path.abspath(os.path.expanduser(config.resultsFile))
+        if config.wordStatsFile is not None:
+            config.wordStatsFile = os.path.abspath(os.path.expanduser(config.wordStatsFile))
+        if config.stateFile is not None:
+            config.stateFile = os.path.abspath(os.path.expanduser(config.stateFile))
+        if config.statsFile is not None:
+            config.statsFile = os.path.abspath(os.path.expanduser(config.statsFile))
+        if config.profileFile is not None:
+            config.profileFile = os.path.abspath(os.path.expanduser(config.profileFile))
         
+        if file_format(config.permutatorOutput)[0] == "zstd" and zstandard is None:
+            self.parser.error(ErrorMessages.ZSTD_NOT_INSTALLED.format(config.permutatorOutput))
+
         # Raise an error if there is conflict in verbosity settings
         if config.verbose and config.silent:
             self.parser.error(ErrorMessages.VERBOSITY_CONFLICT)
@@ -193,6 +470,85 @@ class ProteusArgManager:
         if config.maxHarvestedWords < 1 and config.harvest:
             self.parser.error(ErrorMessages.MAX_HARVEST_TOO_LOW.format(config.maxHarvestedWords))
         
+        # without pipelining the generated domains reach the resolver through the permutator output file
+        if not config.writeGenerated and not (config.pipeline and config.resolve):
+            self.parser.error(ErrorMessages.PERMUTATOR_OUTPUT_REQUIRED)
+
+        if config.checkpointFile is not None and config.pipeline:
+            self.parser.error(ErrorMessages.CHECKPOINT_PIPELINE_CONFLICT)
+
+        # Resolver pool checks
+        if args.resolvers is not None:
+            resolvers_file = os.path.abspath(os.path.expanduser(args.resolvers))
+            if not os.path.isfile(resolvers_file):
+                self.parser.error(ErrorMessages.RESOLVERS_FILE_DOES_NOT_EXIST.format(resolvers_file))
+            with open(resolvers_file, "r") as f:
+                config.resolvers = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+            if not config.resolvers:
+                self.parser.error(ErrorMessages.RESOLVERS_FILE_EMPTY.format(resolvers_file))
+        if config.resolverWorkers < 1:
+            self.parser.error(ErrorMessages.NO_RESOLVER_WORKERS.format(config.resolverWorkers))
+        if config.resolverTimeout <= 0:
+            self.parser.error(ErrorMessages.RESOLVER_TIMEOUT_TOO_LOW.format(config.resolverTimeout))
+        if config.resolverRetries < 0:
+            self.parser.error(ErrorMessages.RESOLVER_RETRIES_TOO_LOW.format(config.resolverRetries))
+        if config.hierarchical and config.resolve:
+            if config.resolverBackend == "dnsx":
+                self.parser.error(ErrorMessages.HIERARCHICAL_REQUIRES_NXDOMAIN)
+            if config.pipeline or config.checkpointFile is not None:
+                self.parser.error(ErrorMessages.HIERARCHICAL_CONFLICT)
+        if config.adaptiveRate and config.resolve:
+            if config.resolverBackend != "native":
+                self.parser.error(ErrorMessages.ADAPTIVE_RATE_REQUIRES_NATIVE)
+            if config.minRateResolver < 1 or config.minRateResolver > config.maxRateResolver:
+                self.parser.error(ErrorMessages.RATE_BOUNDS_INVALID.format(config.minRateResolver, config.maxRateResolver))
+
+        # Cache checks
+        if config.cacheTTL < 1 or config.cacheNegativeTTL < 1:
+            self.parser.error(ErrorMessages.CACHE_TTL_TOO_LOW.format(min(config.cacheTTL, config.cacheNegativeTTL)))
+        if config.cacheMaxEntries < 1:
+            self.parser.error(ErrorMessages.CACHE_MAX_ENTRIES_TOO_LOW.format(config.cacheMaxEntries))
+
+        # Word statistics checks
+        if config.wordTrimRate is not None:
+            if config.wordStatsFile is None:
+                self.parser.error(ErrorMessages.TRIM_REQUIRES_WORD_STATS)
+            if not 0 < config.wordTrimRate <= 1:
+                self.parser.error(ErrorMessages.TRIM_RATE_INVALID.format(config.wordTrimRate))
+        if config.wordTrimMinAttempts < 1:
+            self.parser.error(ErrorMessages.TRIM_MIN_ATTEMPTS_TOO_LOW.format(config.wordTrimMinAttempts))
+
+        if args.shard is not None:
+            index, _, count = args.shard.partition("/")
+            try:
+                config.shardIndex, config.shardCount = int(index), int(count)
+            except ValueError:
+                self.parser.error(ErrorMessages.SHARD_INVALID.format(args.shard))
+            if config.shardCount < 1 or not 1 <= config.shardIndex <= config.shardCount:
+                self.parser.error(ErrorMessages.SHARD_INVALID.format(args.shard))
+
+        if config.rounds < 1:
+            self.parser.error(ErrorMessages.ROUNDS_TOO_LOW.format(config.rounds))
+        if config.rounds > 1 and (not config.resolve or not config.writeGenerated):
+            self.parser.error(ErrorMessages.ROUNDS_REQUIRE_RESOLVING)
+        if config.rounds > 1 and config.ranked:
+            self.parser.error(ErrorMessages.ROUNDS_RANKED_CONFLICT)
+
+        if config.stateFile is not None and config.ranked:
+            self.parser.error(ErrorMessages.STATE_RANKED_CONFLICT)
+
+        if config.maxQueries is not None and config.maxQueries < 1:
+            self.parser.error(ErrorMessages.MAX_QUERIES_TOO_LOW.format(config.maxQueries))
+
+        if config.workers < 1:
+            self.parser.error(ErrorMessages.NO_WORKERS.format(config.workers))
+
+        if not 0 < config.dedupFalsePositiveRate < 1:
+            self.parser.error(ErrorMessages.FALSE_POSITIVE_RATE_INVALID.format(config.dedupFalsePositiveRate))
+
+        if config.memoryBudget < 1:
+            self.parser.error(ErrorMessages.MEMORY_BUDGET_TOO_LOW.format(config.memoryBudget))
+
         # Normalize strategy selection
         config.permutationStrategy = [ps.lower() for ps in config.permutationStrategy]
         if "all" in config.permutationStrategy:
@@ -0,0 +1,320 @@
+import asyncio
+import random
+import socket
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from ProteusConfig import ProteusConfig
+from ProteusIO import read_names
+
+
+RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+RETRY_STATUSES = ("TIMEOUT", "SERVFAIL", "REFUSED") # statuses that are worth asking another resolver about
+TYPE_A = 1
+TYPE_CNAME = 5
+
+
+@dataclass
+class ProteusDNSResult:
+    name: str
+    status: str                                         # NOERROR, NXDOMAIN, SERVFAIL, REFUSED, TIMEOUT, INVALID, ...
+    a: list = field(default_factory=list)               # A records (ipv4 addresses)
+    cname: list = field(default_factory=list)           # CNAME targets
+
+    @property
+    def resolved(self) -> bool: # same criterion as "dnsx -a": the name has at least one A record
+        return self.status == "NOERROR" and len(self.a) > 0
+
+
+def encode_name(name: str) -> bytes:
+    out = bytearray()
+    for label in name.strip(".").split("."):
+        raw = label.encode("ascii")
+        if not raw or len(raw) > 63:
+            raise ValueError(f"invalid label in {name}")
+        out.append(len(raw))
+        out += raw
+    out.append(0)
+    if len(out) > 255:
+        raise ValueError(f"name too long: {name}")
+    return bytes(out)
+
+
+def build_query(qid: int, qname: bytes, qtype: int = TYPE_A) -> bytes:
+    # header: id, flags (recursion desired), 1 question, 0 answers, 0 authority, 0 additional
+    return struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0) + qname + struct.pack("!HH", qtype, 1)
+
+
+def read_name(data: bytes, offset: int) -> tuple[str, int]:
+    labels = []
+    end = None  # offset right after the name, where parsing continues (set at the first pointer)
+    jumps = 0
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0: # compression pointer
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            if jumps > 64:
+                raise ValueError("compression loop")
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    return ".".join(labels).lower(), (end if end is not None else offset)
+
+
+def parse_response(data: bytes) -> tuple[int, str, str, list[str], list[str]]:
+    qid, flags, qdcount, ancount, _, _ = struct.unpack_from("!HHHHHH", data, 0)
+    status = RCODES.get(flags & 0x000F, f"RCODE{flags & 0x000F}")
+    offset = 12
+    qname = ""
+    for _ in range(qdcount):
+        qname, offset = read_name(data, offset)
+        offset += 4
+    a_records = []
+    cnames = []
+    for _ in range(ancount):
+        _, offset = read_name(data, offset)
+        rtype, _, _, rdlen = struct.unpack_from("!HHIH", data, offset)
+        offset += 10
+        if rtype == TYPE_A and rdlen == 4:
+            a_records.append(socket.inet_ntoa(data[offset:offset + 4]))
+        elif rtype == TYPE_CNAME:
+            cnames.append(read_name(data, offset)[0])
+        offset += rdlen
+    return qid, qname, status, a_records, cnames
+
+
+class ProteusTokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate                            # tokens per second, anything at or below 0 is unlimited
+        self.capacity = max(1.0, rate / 20)         # allow bursts of 50ms worth of queries
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# AIMD rate control. The outcome of every query is recorded, and once per interval the share of queries that ended in a
+# TIMEOUT, SERVFAIL or REFUSED decides the new rate: above the error threshold the rate is multiplied by the decrease
+# factor, otherwise the increase step is added, always within the bounds. A timeout is only known one timeout period after
+# the query was sent, so errors keep arriving after the rate was lowered. Only queries sent after the last change count
+# towards the next decision, which keeps a single burst of errors from lowering the rate over and over
+class ProteusRateController:
+    def __init__(self, bucket: ProteusTokenBucket, min_rate: float, max_rate: float):
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.interval = 1.0                                 # seconds between rate decisions
+        self.min_samples = 20                               # outcomes needed for a decision
+        self.error_threshold = 0.02                         # error share above which the rate is lowered
+        self.decrease_factor = 0.75
+        self.increase_step = max(1.0, (max_rate - min_rate) / 100)
+        self.rate = min(max(bucket.rate if bucket.rate > 0 else max_rate, min_rate), max_rate)
+        self.changed = time.monotonic()
+        self.samples = 0
+        self.errors = 0
+        self.history = deque(maxlen=30)                     # rate of the latest intervals, the settled rate is their mean
+        self.decreases = 0
+        self._apply(self.rate)
+
+    @property
+    def settled_rate(self) -> float:
+        return sum(self.history) / len(self.history) if self.history else self.rate
+
+    def record(self, status: str, sent: float):
+        if sent < self.changed:
+            return
+        self.samples += 1
+        if status in RETRY_STATUSES:
+            self.errors += 1
+        now = time.monotonic()
+        if now - self.changed < self.interval or self.samples < self.min_samples:
+            return
+
+        self.history.append(self.rate)
+        if self.errors / self.samples > self.error_threshold:
+            self._apply(max(self.min_rate, self.rate * self.decrease_factor))
+            self.decreases += 1
+        else:
+            self._apply(min(self.max_rate, self.rate + self.increase_step))
+        self.changed = now
+        self.samples = 0
+        self.errors = 0
+
+    def _apply(self, rate: float):
+        self.rate = rate
+        self.bucket.rate = rate
+        self.bucket.capacity = max(1.0, rate / 20)
+        self.bucket.tokens = min(self.bucket.tokens, self.bucket.capacity)
+
+
+class _ProteusDNSProtocol(asyncio.DatagramProtocol):
+    def __init__(self, pending: dict):
+        self.pending = pending
+
+    def datagram_received(self, data, addr):
+        if len(data) < 12:
+            return
+        entry = self.pending.get((data[0] << 8) | data[1])
+        if entry is None:
+            return
+        future, server = entry
+        if addr[0] == server[0] and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        pass # ICMP errors surface as timeouts, which are retried
+
+
+# Native asyncio UDP resolver. Queries are spread round-robin over the resolver pool, rate limited by a token bucket
+# and bounded by an in-flight window (threadsResolver), which takes the place of the dnsx thread count
+class ProteusAsyncResolver:
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+        self.resolvers = [self._parse_resolver(r) for r in config.resolvers]
+        self.window = min(config.threadsResolver, 60000)
+        self.timeout = config.resolverTimeout
+        self.retries = config.resolverRetries
+        self.pending: dict = {}
+        self.free_ids: deque = deque()
+        self.next_resolver = 0
+        self.transport = None
+        self.bucket: Optional[ProteusTokenBucket] = None
+        self.rate_controller: Optional[ProteusRateController] = None
+        self.stats = {"queries": 0, "timeouts": 0, "errors": 0, "retries": 0, "resolved": 0}
+
+    @staticmethod
+    def _parse_resolver(resolver: str) -> tuple[str, int]:
+        host, _, port = resolver.strip().partition(":")
+        return socket.gethostbyname(host), int(port) if port else 53
+
+    async def _query(self, name: str) -> ProteusDNSResult:
+        try:
+            qname = encode_name(name)
+        except (ValueError, UnicodeEncodeError):
+            return ProteusDNSResult(name, "INVALID")
+
+        loop = asyncio.get_running_loop()
+        result = ProteusDNSResult(name, "TIMEOUT")
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+            await self.bucket.acquire()
+            server = self.resolvers[self.next_resolver]
+            self.next_resolver = (self.next_resolver + 1) % len(self.resolvers)
+            qid = self.free_ids.popleft()
+            future = loop.create_future()
+            self.pending[qid] = (future, server)
+            timer = loop.call_later(self.timeout, self._expire, future)
+            self.stats["queries"] += 1
+            sent = time.monotonic()
+            try:
+                self.transport.sendto(build_query(qid, qname), server)
+                data = await future
+            finally:
+                timer.cancel()
+                del self.pending[qid]
+                self.free_ids.append(qid)
+
+            if data is None:
+                self.stats["timeouts"] += 1
+                result = ProteusDNSResult(name, "TIMEOUT")
+            else:
+                try:
+                    _, answered, status, a_records, cnames = parse_response(data)
+                    if answered != name.strip(".").lower():
+                        result = ProteusDNSResult(name, "TIMEOUT") # stale answer for a reused id
+                    else:
+                        result = ProteusDNSResult(name, status, a_records, cnames)
+                except (ValueError, IndexError, struct.error):
+                    result = ProteusDNSResult(name, "FORMERR")
+            if result.status in ("SERVFAIL", "REFUSED"):
+                self.stats["errors"] += 1
+            if self.rate_controller is not None:
+                self.rate_controller.record(result.status, sent)
+            if result.status not in RETRY_STATUSES and result.status != "FORMERR":
+                break
+        if result.resolved:
+            self.stats["resolved"] += 1
+        return result
+
+    @staticmethod
+    def _expire(future):
+        if not future.done():
+            future.set_result(None)
+
+    async def _resolve_all(self, names: Iterable[str], on_result: Callable[[ProteusDNSResult], None]):
+        loop = asyncio.get_running_loop()
+        ids = list(range(65536))
+        random.shuffle(ids)
+        self.free_ids = deque(ids)
+        self.bucket = ProteusTokenBucket(self.config.rateResolver)
+        if self.config.adaptiveRate:
+            self.rate_controller = ProteusRateController(self.bucket, self.config.minRateResolver, self.config.maxRateResolver)
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: _ProteusDNSProtocol(self.pending), family=socket.AF_INET)
+
+        window = asyncio.Semaphore(self.window)
+        tasks = set()
+
+        async def run(name):
+            try:
+                on_result(await self._query(name))
+            finally:
+                window.release()
+
+        try:
+            for name in names:
+                await window.acquire()
+                task = loop.create_task(run(name))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            self.transport.close()
+
+    # Resolves every name and hands each result to on_result as soon as it is available
+    def resolve_names(self, names: Iterable[str], on_result: Callable[[ProteusDNSResult], None]):
+        asyncio.run(self._resolve_all(names, on_result))
+
+    # Resolves every name in the input file (in any of the formats of ProteusIO), and writes the names with an A record to the output file
+    def resolve_file(self, input_path: str, output_path: str):
+        self.resolve_to_file(read_names(input_path, self.config.writeBufferSize), output_path)
+
+    # Resolves a stream of names (for example straight from the permutator), writing the names with an A record to the output file
+    # If set, on_result additionally receives every result (for example to cache it)
+    def resolve_to_file(self, names: Iterable[str], output_path: str, on_result: Optional[Callable[[ProteusDNSResult], None]] = None):
+        start = time.monotonic()
+        with open(output_path, "w", buffering=self.config.writeBufferSize) as out:
+            def write(result: ProteusDNSResult):
+                if result.resolved:
+                    out.write(result.name + "\n")
+                if on_result is not None:
+                    on_result(result)
+            self.resolve_names(names, write)
+
+        if not self.config.silent:
+            elapsed = max(time.monotonic() - start, 0.001)
+            print(f"resolved {self.stats['resolved']} domains with {self.stats['queries']} queries ({self.stats['timeouts']} timeouts, {self.stats['errors']} SERVFAIL/REFUSED, {self.stats['retries']} retries) in {elapsed:.1f}s ({self.stats['queries'] / elapsed:.0f} queries/s)")
+            if self.rate_controller is not None:
+                print(f"adaptive rate settled at {self.rate_controller.settled_rate:.0f} queries/s (bounds {self.config.minRateResolver}-{self.config.maxRateResolver}, lowered {self.rate_controller.decreases} time(s))")
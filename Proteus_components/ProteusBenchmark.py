@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from ProteusAsyncResolver import ProteusAsyncResolver
+from ProteusConfig import ProteusConfig
+from ProteusDeduplicator import ProteusDeduplicator
+from ProteusHarvester import ProteusHarvester
+from ProteusPermutator import ProteusPermutator
+from ProteusStubDNS import ProteusStubDNS
+
+
+# Reproducible benchmarks of the permutation, harvest, dedup and resolve stages. Every run uses synthetic corpora generated
+# from a fixed seed, and the results are written as JSON so they can be compared between versions
+class ProteusBenchmark:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="proteus_benchmark_")
+        self.script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.words = self._words(args.words)
+        self.results: dict = {
+            "version": self._version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": int(time.time()),
+            "seed": args.seed,
+            "words": len(self.words),
+            "scales": {},
+        }
+
+    def _version(self) -> str:
+        try:
+            return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=self.script_dir, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "unknown"
+
+    def _words(self, amount: int) -> list[str]:
+        with open(os.path.join(self.script_dir, "baselists", "default_baselist.txt"), "r") as f:
+            words = [w.strip().lower() for w in f if w.strip()]
+        return words[:amount]
+
+    # Synthetic input: subdomains of a handful of registered domains, with 0 to max_depth extra labels
+    def make_corpus(self, size: int) -> str:
+        rng = random.Random(self.args.seed)
+        labels = ["api", "dev", "staging", "mail", "vpn", "app", "cdn", "auth", "internal", "prod", "eu", "us", "web", "db"]
+        zones = [f"target{i}.com" for i in range(10)]
+        path = os.path.join(self.workdir, f"corpus_{size}.txt")
+        seen = set()
+        with open(path, "w") as f:
+            while len(seen) < size:
+                depth = rng.randint(0, self.args.max_depth)
+                parts = [f"{rng.choice(labels)}{rng.randint(0, size // 50)}" for _ in range(depth)]
+                domain = ".".join(parts + [rng.choice(zones)])
+                if domain not in seen:
+                    seen.add(domain)
+                    f.write(domain + "\n")
+        return path
+
+    def config(self, corpus: str, **kwargs) -> ProteusConfig:
+        config = ProteusConfig(file=corpus, silent=True, useBaselist=False, harvest=False,
+                               permutationStrategy=["simple", "hyphenate", "insert", "append-hyphenate"])
+        for key, value in kwargs.items():
+            setattr(config, key, value)
+        return config
+
+    @staticmethod
+    def timed(function):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = function()
+        return result, time.perf_counter() - wall, time.process_time() - cpu
+
+    def bench_harvest(self, corpus: str) -> dict:
+        harvester = ProteusHarvester(self.config(corpus, harvest=True))
+        _, wall, cpu = self.timed(harvester.harvest)
+        lines = sum(1 for _ in open(corpus))
+        return {"lines": lines, "seconds": wall, "cpu_seconds": cpu, "lines_per_second": lines / max(wall, 1e-9)}
+
+    # Candidates per second of every strategy, measured over at most max_candidates candidates
+    def bench_strategies(self, corpus: str) -> dict:
+        permutator = ProteusPermutator(self.config(corpus))
+        permutator.permutators = set(self.words)
+        permutator.read_input_domains()
+        results = {}
+        for strategy in permutator.strategy_order:
+            generator = permutator.strategies[strategy](permutator.input_domains)
+            count, wall, cpu = self.timed(lambda: sum(1 for _ in itertools.islice(generator, self.args.max_candidates)))
+            results[strategy] = {"candidates": count, "seconds": wall, "cpu_seconds": cpu, "candidates_per_second": count / max(wall, 1e-9)}
+        return results
+
+    def bench_dedup(self, corpus: str) -> dict:
+        permutator = ProteusPermutator(self.config(corpus))
+        permutator.permutators = set(self.words)
+        permutator.read_input_domains()
+        results = {}
+        for backend in ["sort", "partition", "bloom"]:
+            config = self.config(corpus, dedupBackend=backend, memoryBudget=self.args.memory_budget)
+            cwd = os.getcwd()
+            os.chdir(self.workdir) # spilled runs and partitions are written to the working directory
+            consumed = 0
+            def counted(candidates):
+                nonlocal consumed
+                for candidate in candidates:
+                    consumed += 1
+                    yield candidate
+            try:
+                candidates = counted(itertools.islice(permutator.permutate(), self.args.max_candidates))
+                count, wall, cpu = self.timed(lambda: sum(1 for _ in ProteusDeduplicator(config).dedup(candidates)))
+            finally:
+                os.chdir(cwd)
+            results[backend] = {"candidates": consumed, "unique": count, "seconds": wall, "cpu_seconds": cpu, "items_per_second": consumed / max(wall, 1e-9)}
+        return results
+
+    # ru_maxrss of a child carries over the peak of the benchmark process it was forked from, so on linux the peak is read
+    # from the high water mark of the child itself while it runs
+    @staticmethod
+    def _high_water_mark(pid: int) -> int:
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    # Peak RSS of a full permutation run (no resolving) in a child process, in normal and in low-ram mode
+    def bench_rss(self, corpus: str) -> dict:
+        words_file = os.path.join(self.workdir, "words.txt")
+        with open(words_file, "w") as f:
+            f.write("\n".join(self.words) + "\n")
+
+        results = {}
+        for mode, extra in [("normal", []), ("low_ram", ["--low-ram-mode"])]:
+            output = os.path.join(self.workdir, f"generated_{mode}.txt")
+            if os.path.exists(output):
+                os.remove(output)
+            command = [sys.executable, os.path.join(self.script_dir, "Proteus.py"), "-f", corpus, "-b", words_file, "--no-harvest",
+                       "--no-resolve", "-s", "-ps", *self.args.strategies, "-go", output, *extra]
+            start = time.perf_counter()
+            process = subprocess.Popen(command, cwd=self.workdir)
+            peak = 0
+            while process.poll() is None:
+                peak = max(peak, self._high_water_mark(process.pid))
+                time.sleep(0.02)
+            wall = time.perf_counter() - start
+            lines = sum(1 for _ in open(output)) if os.path.exists(output) else 0
+            results[mode] = {"exit_code": process.returncode, "generated": lines, "seconds": wall, "peak_rss_bytes": peak}
+            if os.path.exists(output):
+                os.remove(output)
+        return results
+
+    def bench_resolver(self, corpus: str) -> dict:
+        permutator = ProteusPermutator(self.config(corpus))
+        permutator.permutators = set(self.words)
+        permutator.read_input_domains()
+        names = list(itertools.islice(permutator.permutate(), self.args.resolve_queries))
+
+        stub = ProteusStubDNS()
+        address = stub.start()
+        try:
+            config = self.config(corpus, resolvers=[address], rateResolver=-1, threadsResolver=self.args.resolver_window, resolverTimeout=1.0)
+            resolver = ProteusAsyncResolver(config)
+            resolved = []
+            _, wall, cpu = self.timed(lambda: resolver.resolve_names(names, lambda r: resolved.append(r.resolved)))
+        finally:
+            stub.stop()
+        return {"names": len(names), "resolved": sum(resolved), "queries": resolver.stats["queries"], "timeouts": resolver.stats["timeouts"],
+                "seconds": wall, "cpu_seconds": cpu, "queries_per_second": resolver.stats["queries"] / max(wall, 1e-9)}
+
+    def run(self) -> dict:
+        for scale in self.args.scales:
+            if not self.args.quiet:
+                print(f"benchmarking {scale} subdomains", file=sys.stderr)
+            corpus = self.make_corpus(scale)
+            results = {"harvest": self.bench_harvest(corpus), "strategies": self.bench_strategies(corpus), "dedup": self.bench_dedup(corpus)}
+            if not self.args.no_rss:
+                results["rss"] = self.bench_rss(corpus)
+            if not self.args.no_resolve:
+                results["resolve"] = self.bench_resolver(corpus)
+            self.results["scales"][str(scale)] = results
+            os.remove(corpus)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        return self.results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the Proteus permutation, harvest, dedup and resolve stages. Results are written as JSON")
+    parser.add_argument("-o", "--output", type=str, default=None, help="set the file to write the JSON results to [DEFAULT: stdout]")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 100000, 1000000], help="set the sizes of the synthetic inputs [DEFAULT: 1000 100000 1000000]")
+    parser.add_argument("--max-depth", type=int, default=3, help="set the maximum amount of labels added in front of the registered domains [DEFAULT: 3]")
+    parser.add_argument("--words", type=int, default=50, help="set the amount of baselist words used for permutating [DEFAULT: 50]")
+    parser.add_argument("--max-candidates", type=int, default=2000000, help="set the maximum amount of candidates measured per strategy and dedup backend [DEFAULT: 2000000]")
+    parser.add_argument("--memory-budget", type=int, default=64, help="set the memory budget (MB) of the dedup backends [DEFAULT: 64]")
+    parser.add_argument("-ps", "--strategies", type=str, nargs="+", default=["simple"], help="set the strategies of the peak RSS runs [DEFAULT: simple]")
+    parser.add_argument("--resolve-queries", type=int, default=50000, help="set the amount of names resolved against the stub DNS server [DEFAULT: 50000]")
+    parser.add_argument("--resolver-window", type=int, default=500, help="set the amount of queries in flight of the native resolver [DEFAULT: 500]")
+    parser.add_argument("--seed", type=int, default=1337, help="set the seed of the synthetic inputs [DEFAULT: 1337]")
+    parser.add_argument("--no-rss", action="store_true", help="skip the peak RSS runs")
+    parser.add_argument("--no-resolve", action="store_true", help="skip the resolver benchmark")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress")
+    args = parser.parse_args()
+
+    results = ProteusBenchmark(args).run()
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator
+
+from ProteusAsyncResolver import ProteusDNSResult
+from ProteusConfig import ProteusConfig
+
+
+# Persistent resolution cache shared across runs, stored in SQLite and keyed by FQDN. Every entry holds the status and answers
+# of the last resolution, the time it was resolved and a TTL. Fresh entries are not queried again
+class ProteusResolutionCache:
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+        self.batch_size = 900                                   # names looked up per statement (older SQLite versions allow 999 variables)
+        self.uncacheable = ("TIMEOUT", "SERVFAIL", "REFUSED")   # failures say nothing about the name, so they are not cached
+        self.pending: list[tuple] = []
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "expired": 0, "evicted": 0}
+
+        self.lock = threading.RLock()    # concurrent low-ram cycles share the cache
+        self.db = sqlite3.connect(config.cacheFile, check_same_thread=False)
+        self.db.execute("PRAGMA auto_vacuum = INCREMENTAL") # only applies to new databases, lets eviction return space to the disk
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS resolutions (
+            fqdn TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            resolved INTEGER NOT NULL,
+            answers TEXT NOT NULL,
+            resolved_at INTEGER NOT NULL,
+            ttl INTEGER NOT NULL
+        ) WITHOUT ROWID""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS resolutions_resolved_at ON resolutions (resolved_at)")
+        self.db.commit()
+
+    # Yields the names without a fresh cache entry. Names with a fresh entry that resolved are appended to resolved
+    def filter(self, names: Iterable[str], resolved: list[str]) -> Iterator[str]:
+        batch = []
+        for name in names:
+            batch.append(name)
+            if len(batch) >= self.batch_size:
+                yield from self._filter_batch(batch, resolved)
+                batch = []
+        if batch:
+            yield from self._filter_batch(batch, resolved)
+
+    def _filter_batch(self, batch: list[str], resolved: list[str]) -> list[str]:
+        now = int(time.time())
+        placeholders = ",".join("?" * len(batch))
+        fresh = {}
+        with self.lock:
+            for fqdn, was_resolved in self.db.execute(
+                    f"SELECT fqdn, resolved FROM resolutions WHERE fqdn IN ({placeholders}) AND resolved_at + ttl > ?", (*batch, now)):
+                fresh[fqdn] = bool(was_resolved)
+        misses = []
+        for name in batch:
+            hit = fresh.get(name)
+            if hit is None:
+                misses.append(name)
+            elif hit:
+                resolved.append(name)
+        with self.lock:
+            self.stats["hits"] += len(batch) - len(misses)
+            self.stats["misses"] += len(misses)
+        return misses
+
+    def add(self, result: ProteusDNSResult):
+        if result.status in self.uncacheable:
+            return
+        self._add(result.name, result.status, result.resolved, ",".join(result.a + result.cname))
+
+    def _add(self, name: str, status: str, resolved: bool, answers: str):
+        ttl = self.config.cacheTTL if resolved else self.config.cacheNegativeTTL
+        with self.lock:
+            self.pending.append((name, status, int(resolved), answers, int(time.time()), ttl))
+            if len(self.pending) >= self.batch_size * 10:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            self.db.executemany("INSERT OR REPLACE INTO resolutions (fqdn, status, resolved, answers, resolved_at, ttl) VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+            self.db.commit()
+            self.stats["stored"] += len(self.pending)
+            self.pending.clear()
+
+    # Removes expired entries, then the oldest entries until the cache is within cacheMaxEntries
+    def evict(self):
+        self.flush()
+        self.stats["expired"] += self.db.execute("DELETE FROM resolutions WHERE resolved_at + ttl <= ?", (int(time.time()),)).rowcount
+        excess = self.db.execute("SELECT COUNT(*) FROM resolutions").fetchone()[0] - self.config.cacheMaxEntries
+        if excess > 0:
+            self.stats["evicted"] += self.db.execute(
+                "DELETE FROM resolutions WHERE fqdn IN (SELECT fqdn FROM resolutions ORDER BY resolved_at LIMIT ?)", (excess,)).rowcount
+        self.db.commit()
+        self.db.executescript("PRAGMA incremental_vacuum;") # execute() only steps the pragma once, which frees a single page
+
+    def close(self):
+        self.evict()
+        if not self.config.silent:
+            entries = self.db.execute("SELECT COUNT(*) FROM resolutions").fetchone()[0]
+            print(f"resolution cache: {self.stats['hits']} hits, {self.stats['misses']} misses, {self.stats['stored']} stored, {self.stats['expired']} expired, {self.stats['evicted']} evicted, {entries} entries")
+        self.db.close()
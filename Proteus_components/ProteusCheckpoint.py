@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+
+from ProteusConfig import ProteusConfig
+
+
+# Checkpoint manifest for long runs. Every phase stores its progress in its own section, together with a signature of the
+# inputs it was started with. A section is only resumed if the signature still matches, otherwise the phase starts over
+class ProteusCheckpoint:
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+        self.path = config.checkpointFile
+        self.state: dict = {}
+
+        if config.resume and os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.state = json.load(f)
+            if not config.silent:
+                print(f"resuming from checkpoint {self.path}")
+
+    @staticmethod
+    def signature(*parts) -> str:
+        digest = hashlib.sha1()
+        for part in parts:
+            digest.update(repr(part).encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_signature(path: str) -> tuple:
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    # Returns the progress of a phase, or a fresh section if there is none or it was started with different inputs
+    def section(self, name: str, signature: str) -> dict:
+        section = self.state.get(name)
+        if section is None or section.get("signature") != signature:
+            section = {"signature": signature}
+            self.state[name] = section
+        return section
+
+    # The manifest is replaced atomically, so a crash while saving never leaves a broken manifest behind
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
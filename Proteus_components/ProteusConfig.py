@@ -4,6 +4,7 @@ from dataclasses import dataclass, field
 @dataclass
 class ProteusConfig:
     file: str                                               # [REQUIRED] set a target file containing the subdomains to use for permutation
+    inputFiles: list = field(default_factory=list)          # all target files, "-" reads stdin. If not set only file is read
     baselist: str = "default"                               # use a custom preset list of words for permutation. If no custom list is set proteus uses the default list.
     threadsResolver: int = 100                              # dnsx threads  (default 100)
     rateResolver: int = 200                                 # dnsx rate limit   (default 200)
@@ -19,6 +20,42 @@ class ProteusConfig:
     permutatorOutput: str = "generated_domains.txt"         # permutator output file (default generated_domains.txt)
     permutationStrategy: list = field(default_factory=list) # permutation strategy to use (default simple)
     lowRamMode: bool = False                                # Low ram mode toggle (default False)
+    memoryBudget: int = 512                                 # memory budget in MB for deduplicating generated domains (default 512, 64 in low ram mode)
+    dedupBackend: str = "sort"                              # deduplication of generated domains: sort, partition or bloom (default sort)
+    dedupFalsePositiveRate: float = 0.0001                  # false positive rate of the bloom backend (default 0.0001)
+    writeBufferSize: int = 1048576                          # size in bytes of the buffers used when writing output files (default 1MB)
+    ranked: bool = False                                    # generate the candidates best-first instead of per strategy (default False)
+    maxQueries: int = None                                  # stop generating after this amount of unique candidates, implies ranked (default None, unlimited)
+    shardIndex: int = 1                                     # shard of the candidate space this node generates and resolves, from 1 to shardCount (default 1)
+    shardCount: int = 1                                     # amount of shards the candidate space is split into over the nodes (default 1, not sharded)
+    rounds: int = 1                                         # feedback rounds, every round permutates the new domains resolved by the previous one (default 1)
+    stateFile: str = None                                   # run-state snapshot, later runs with the same file only generate the delta, disabled if not set (default None)
+    plan: bool = False                                      # only print the permutation plan, without generating or resolving anything (default False)
+    workers: int = 1                                        # amount of worker processes used for permutating (default 1)
+    pipeline: bool = False                                  # resolve generated domains while they are being generated (default False)
+    writeGenerated: bool = True                             # write the generated domains to the permutator output file (default True)
+    wildcardFilter: bool = False                            # detect wildcard zones, skip candidates below them and filter wildcard answers (default False)
+    cacheFile: str = None                                   # persistent resolution cache (SQLite), disabled if not set (default None)
+    cacheTTL: int = 604800                                  # seconds a resolved domain stays fresh in the cache (default 7 days)
+    cacheNegativeTTL: int = 86400                           # seconds an unresolved domain stays fresh in the cache (default 1 day)
+    cacheMaxEntries: int = 20000000                         # maximum amount of cache entries, the oldest are evicted first (default 20 million)
+    resultsFile: str = None                                 # indexed result store (SQLite) with the records and origin of every resolved domain, disabled if not set (default None)
+    wordStatsFile: str = None                               # persistent hit rates of the words per strategy (SQLite), disabled if not set (default None)
+    wordTrimRate: float = None                              # leave out the words with a hit rate below this rate with a strategy, disabled if not set (default None)
+    wordTrimMinAttempts: int = 1000                         # attempts a word needs with a strategy before it can be trimmed (default 1000)
+    checkpointFile: str = None                              # checkpoint manifest recording completed chunks, disabled if not set (default None)
+    resume: bool = False                                    # resume from the checkpoint manifest (default False)
+    resolverWorkers: int = 1                                # concurrent resolver cycles in low-ram mode, sharing the rate and threads (default 1)
+    resolverBackend: str = "dnsx"                           # resolver used for resolving generated domains, dnsx, massdns or native (default dnsx)
+    resolvers: list = field(default_factory=lambda: ["1.1.1.1", "1.0.0.1", "8.8.8.8", "8.8.4.4", "9.9.9.9", "149.112.112.112"]) # resolver pool for the native and massdns resolvers
+    resolverTimeout: float = 2.0                            # per-query timeout in seconds for the native resolver (default 2.0)
+    resolverRetries: int = 2                                # retries per query for the native and massdns resolvers (default 2)
+    hierarchical: bool = False                              # resolve the generated domains level by level, skipping those below names that do not exist (default False)
+    adaptiveRate: bool = False                              # adapt the rate of the native resolver to its error rate, starting at rateResolver (default False)
+    minRateResolver: int = 20                               # lowest rate of the adaptive rate control (default 20)
+    maxRateResolver: int = 1000                             # highest rate of the adaptive rate control (default 1000)
+    statsFile: str = None                                   # JSON file receiving the per-stage metrics of the run, disabled if not set (default None)
+    profileFile: str = None                                 # cProfile output file (pstats format) of the run, disabled if not set (default None)
 
 @dataclass
 class ErrorMessages:
@@ -36,5 +73,33 @@ class ErrorMessages:
     FILE_ALREADY_EXISTS = "!!!\nThe file {} already exists. Either select a different name for this output file, or enable file overwriting\n!!!"
     RESOLVER_NO_TARGETS = "!!!\nSomething went wrong! The resolver did not receive any targets\n!!!"
     GENERATED_FILE_DOES_NOT_EXIST = "!!!\nThe file containing the generated domains does not exist: {}\n!!!"
+    MEMORY_BUDGET_TOO_LOW = "!!!\nYou set the memory budget to {}MB, but it requires at least 1MB\n!!!"
+    RESOLVERS_FILE_DOES_NOT_EXIST = "!!!\nThe selected resolvers file does not exist: {}\n!!!"
+    RESOLVERS_FILE_EMPTY = "!!!\nThe resolvers file does not contain any resolvers: {}\n!!!"
+    RESOLVER_TIMEOUT_TOO_LOW = "!!!\nYou set the resolver timeout to {} seconds, but it has to be above 0\n!!!"
+    RESOLVER_RETRIES_TOO_LOW = "!!!\nYou set the resolver retries to {}, but it can not be negative\n!!!"
+    PERMUTATOR_OUTPUT_REQUIRED = "!!!\nYou disabled the permutator output, but without pipeline mode the generated domains are only passed to the resolver through this file. Enable pipeline mode with --pipeline to disable the permutator output\n!!!"
+    NO_WORKERS = "!!!\nYou set the permutator to use {} workers, but it requires at least 1 worker\n!!!"
+    CACHE_TTL_TOO_LOW = "!!!\nYou set a cache TTL to {} seconds, but it has to be above 0\n!!!"
+    CACHE_MAX_ENTRIES_TOO_LOW = "!!!\nYou set the maximum amount of cache entries to {}, but it requires at least 1 entry\n!!!"
+    CHECKPOINT_PIPELINE_CONFLICT = "!!!\nCheckpointing works on chunks of the generated domains file, which pipeline mode does not use. Disable either pipeline mode or checkpointing\n!!!"
+    NO_RESOLVER_WORKERS = "!!!\nYou set the resolver to use {} concurrent cycles, but it requires at least 1\n!!!"
+    FALSE_POSITIVE_RATE_INVALID = "!!!\nYou set the false positive rate of the bloom filter to {}, but it has to be between 0 and 1\n!!!"
+    STDIN_MULTIPLE_TIMES = "!!!\nYou set stdin (-) as a target file more than once, but it can only be read once\n!!!"
+    MAX_QUERIES_TOO_LOW = "!!!\nYou set the query budget to {}, but it requires at least 1 query\n!!!"
+    ROUNDS_TOO_LOW = "!!!\nYou set the amount of rounds to {}, but it requires at least 1 round\n!!!"
+    ROUNDS_REQUIRE_RESOLVING = "!!!\nFeedback rounds permutate the domains resolved by the previous round, which requires resolving and the permutator output. Enable resolving and the permutator output, or use a single round\n!!!"
+    ROUNDS_RANKED_CONFLICT = "!!!\nFeedback rounds generate every delta candidate, which does not combine with ranked generation or a query budget. Disable either the rounds or ranked generation\n!!!"
+    STATE_RANKED_CONFLICT = "!!!\nA delta run only generates the candidates that are new compared to the state file, which does not combine with ranked generation or a query budget. Disable either the state file or ranked generation\n!!!"
+    STATE_FILE_INVALID = "!!!\nThe state file could not be read: {}\n!!!"
+    ZSTD_NOT_INSTALLED = "!!!\nWriting zstd compressed files requires the zstandard package (pip install zstandard): {}\n!!!"
+    RATE_BOUNDS_INVALID = "!!!\nYou set the adaptive rate bounds to {} - {}, but the minimum has to be at least 1 and can not be above the maximum\n!!!"
+    ADAPTIVE_RATE_REQUIRES_NATIVE = "!!!\nAdaptive rate control is only available with the native resolver backend (--resolver-backend native), dnsx and massdns do not change their rate while running\n!!!"
+    HIERARCHICAL_REQUIRES_NXDOMAIN = "!!!\nHierarchical resolving needs the NXDOMAIN answers, which dnsx does not report. Use the native or massdns resolver backend (--resolver-backend)\n!!!"
+    HIERARCHICAL_CONFLICT = "!!!\nHierarchical resolving resolves the generated domains level by level after permutating, so it can not be combined with pipeline mode or checkpointing\n!!!"
+    SHARD_INVALID = "!!!\nThe shard has to be set as i/N, with N the amount of shards and i the shard of this node, from 1 to N: {}\n!!!"
+    TRIM_REQUIRES_WORD_STATS = "!!!\nTrimming words requires the word statistics of earlier runs, set a word statistics file with --word-stats\n!!!"
+    TRIM_RATE_INVALID = "!!!\nYou set the trim rate to {}, but it has to be above 0 and at most 1\n!!!"
+    TRIM_MIN_ATTEMPTS_TOO_LOW = "!!!\nYou set the minimum amount of attempts before trimming to {}, but it has to be at least 1\n!!!"
     STRATEGY_ERROR = "!!!\nSomething went wrong in the strategy selection!\n!!!"
     PLACEHOLDER_ERROR = "!!!\nPLACEHOLDER ERROR MESSAGE\n!!!"
\ No newline at end of file
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+from ProteusAPI import ProteusAPI
+from ProteusConfig import ProteusConfig
+
+
+# Long-running job service on a local Unix socket. A client sends a single JSON request line per connection, and receives
+# the results as JSON lines while the job runs, followed by a final line with "done" (or "error"). Jobs run concurrently
+# (up to max_jobs, later jobs wait for a free slot) and share a single ProteusAPI, which keeps the baselist and the
+# resolution results warm between jobs. Requests:
+#   {"op": "harvest", "domains": [...], "max_words": 200}                      -> {"word": ..., "count": ...}
+#   {"op": "permutations", "domains": [...], "words": [...], "strategies": [...]} -> {"name": ...}
+#   {"op": "resolve", "names": [...], "only_resolved": false}                   -> {"name": ..., "status": ..., "a": [...], "cname": [...]}
+#   {"op": "run", "domains": [...], "words": [...], "strategies": [...]}        -> the resolved permutations, like resolve
+# words, strategies, max_words and only_resolved are optional
+class ProteusDaemon:
+    def __init__(self, socket_path: str, api: ProteusAPI, max_jobs: int = 4):
+        self.socket_path = socket_path
+        self.api = api
+        self.jobs = threading.BoundedSemaphore(max_jobs)
+        self.server = None
+
+    def handle(self, request: dict, send):
+        op = request.get("op")
+        if op == "ping":
+            return
+        if op == "harvest":
+            for word, count in self.api.harvest(request["domains"], request.get("max_words")):
+                send({"word": word, "count": count})
+        elif op == "permutations":
+            for name in self.api.permutations(request["domains"], request.get("words"), request.get("strategies")):
+                send({"name": name})
+        elif op == "resolve":
+            for result in self.api.resolve(request["names"], request.get("only_resolved", False)):
+                send({"name": result.name, "status": result.status, "a": result.a, "cname": result.cname})
+        elif op == "run":
+            names = self.api.permutations(request["domains"], request.get("words"), request.get("strategies"))
+            for result in self.api.resolve(names, only_resolved=True):
+                send({"name": result.name, "status": result.status, "a": result.a, "cname": result.cname})
+        else:
+            raise ValueError(f"unknown op: {op}")
+
+    def serve_forever(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                start = time.monotonic()
+                count = 0
+                def send(item: dict):
+                    nonlocal count
+                    self.wfile.write((json.dumps(item) + "\n").encode())
+                    count += 1
+                try:
+                    request = json.loads(self.rfile.readline())
+                    with daemon.jobs:
+                        daemon.handle(request, send)
+                    self.wfile.write((json.dumps({"done": True, "count": count, "seconds": round(time.monotonic() - start, 3)}) + "\n").encode())
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # the client went away, the job stops with it
+                except Exception as e:
+                    try:
+                        self.wfile.write((json.dumps({"error": f"{type(e).__name__}: {e}"}) + "\n").encode())
+                    except OSError:
+                        pass
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        if os.path.exists(self.socket_path): # left behind by an earlier daemon
+            os.remove(self.socket_path)
+        self.server = Server(self.socket_path, Handler)
+        os.chmod(self.socket_path, 0o600) # jobs send queries on behalf of the user, so only the user can submit them
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proteus job service: runs harvest, permutation and resolve jobs sent as JSON over a local Unix socket")
+    parser.add_argument("--socket", type=str, default="proteus.sock", help="set the path of the Unix socket [DEFAULT: proteus.sock]")
+    parser.add_argument("--max-jobs", type=int, default=4, help="set the amount of jobs that run concurrently [DEFAULT: 4]")
+    parser.add_argument("-b", "--baselist", type=str, default="default", help="set the baselist file, loaded once for all jobs [DEFAULT: the default baselist]")
+    parser.add_argument("-ps", "--permutation-strategy", type=str, nargs="+", default=["simple"], help="set the strategies of jobs that do not set any [DEFAULT: simple]")
+    parser.add_argument("-mhw", "--max-harvested-words", type=int, default=200, help="set the amount of harvested words used for permutating [DEFAULT: 200]")
+    parser.add_argument("-r", "--resolvers", type=str, default=None, help="set a file containing the resolvers, one ip (or ip:port) per line [DEFAULT: public resolvers of cloudflare, google and quad9]")
+    parser.add_argument("-t", "--threads-resolver", type=int, default=100, help="set the amount of queries in flight per job [DEFAULT: 100]")
+    parser.add_argument("-rr", "--rate-resolver", type=int, default=200, help="set the rate limit per job, any value at or below 0 is unlimited [DEFAULT: 200]")
+    parser.add_argument("--resolver-timeout", type=float, default=2.0, help="set the timeout in seconds of a single query [DEFAULT: 2.0]")
+    parser.add_argument("--resolver-retries", type=int, default=2, help="set the amount of retries of a query that timed out or failed [DEFAULT: 2]")
+    args = parser.parse_args()
+
+    config = ProteusConfig(file="-", silent=True, permutationStrategy=args.permutation_strategy, maxHarvestedWords=args.max_harvested_words,
+                           threadsResolver=args.threads_resolver, rateResolver=args.rate_resolver if args.rate_resolver > 0 else -1,
+                           resolverTimeout=args.resolver_timeout, resolverRetries=args.resolver_retries)
+    if args.baselist != "default":
+        config.baselist = os.path.abspath(os.path.expanduser(args.baselist))
+    if args.resolvers is not None:
+        with open(os.path.expanduser(args.resolvers), "r") as f:
+            config.resolvers = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    api = ProteusAPI(config)
+    api.baselist() # loaded before the first job
+    daemon = ProteusDaemon(os.path.abspath(os.path.expanduser(args.socket)), api, args.max_jobs)
+    print(f"proteus daemon listening on {daemon.socket_path}")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)) # stops serving like an interrupt does, which removes the socket
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import hashlib
+import heapq
+import math
+import os
+import tempfile
+import zlib
+from typing import Iterable, Iterator
+
+from ProteusConfig import ProteusConfig
+
+
+# Bloom filter sized to a fixed amount of memory. The amount of hashes is chosen for the configured false positive rate,
+# which holds as long as the filter contains at most "capacity" items
+class ProteusBloomFilter:
+    def __init__(self, memory_bytes: int, fp_rate: float):
+        self.bit_count = max(8, memory_bytes * 8)
+        self.bits = bytearray(self.bit_count // 8)
+        self.hash_count = max(1, math.ceil(-math.log2(fp_rate)))
+        self.capacity = int(self.bit_count * (math.log(2) ** 2) / -math.log(fp_rate))
+        self.count = 0
+
+    # adds the item, returns False if the item was (probably) already in the filter
+    def add(self, item: str) -> bool:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        new = False
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % self.bit_count
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+
+class ProteusDeduplicator:
+    def __init__(self, config: ProteusConfig, memory_budget: int = None, backend: str = None):
+        self.config = config
+        if memory_budget is None:
+            memory_budget = config.memoryBudget
+        self.memory_budget = memory_budget
+        self.backend = backend if backend is not None else config.dedupBackend
+        self.entry_cost = 120   # rough amount of bytes a short string costs while held in a set (object + hash slot)
+        self.max_entries = max(1, (memory_budget * 1024 * 1024) // self.entry_cost)
+        self.partition_count = 64   # amount of partition files for the partition backend
+        self.run_files: list[str] = []
+
+    # Yields every unique item once, using the selected backend:
+    # sort      exact, sorted output. Spills sorted runs to disk once the budget is reached and merges them (like "sort -u")
+    # partition exact, hash-partitions the items over files on disk and deduplicates every partition on its own
+    # bloom     approximate, a bloom filter of the memory budget. Items are yielded in generation order, and a fraction
+    #           (the false positive rate) of the unique items is dropped
+    def dedup(self, items: Iterable[str]) -> Iterator[str]:
+        if self.backend == "bloom":
+            return self._dedup_bloom(items)
+        if self.backend == "partition":
+            return self._dedup_partition(items)
+        return self._dedup_sort(items)
+
+    def _dedup_sort(self, items: Iterable[str]) -> Iterator[str]:
+        seen = set()
+        for item in items:
+            seen.add(item)
+            if len(seen) >= self.max_entries:
+                self._spill(seen)
+                seen = set()
+
+        if not self.run_files:
+            yield from sorted(seen)
+            return
+
+        if seen:
+            self._spill(seen)
+        seen = None
+        yield from self.merge_sorted_files(self.run_files, remove=True)
+        self.run_files = []
+
+    def _dedup_bloom(self, items: Iterable[str]) -> Iterator[str]:
+        bloom = ProteusBloomFilter(self.memory_budget * 1024 * 1024, self.config.dedupFalsePositiveRate)
+        warned = False
+        for item in items:
+            if bloom.add(item):
+                yield item
+                if bloom.count > bloom.capacity and not warned and not self.config.silent:
+                    print(f"the bloom filter holds more than {bloom.capacity} items, the false positive rate is now above {self.config.dedupFalsePositiveRate}. Increase the memory budget to prevent this")
+                    warned = True
+
+    # Items are spread over partition files by hash, so equal items always end up in the same partition. Every partition
+    # is then deduplicated on its own (spilling to sorted runs if a partition does not fit the budget either)
+    def _dedup_partition(self, items: Iterable[str]) -> Iterator[str]:
+        paths = []
+        files = []
+        try:
+            for i in range(self.partition_count):
+                fd, path = tempfile.mkstemp(prefix=f"proteus_dedup_partition_{i}_", suffix=".txt", dir=os.getcwd())
+                paths.append(path)
+                files.append(os.fdopen(fd, "w", buffering=max(65536, self.config.writeBufferSize // self.partition_count)))
+            for item in items:
+                files[zlib.crc32(item.encode()) % self.partition_count].write(item + "\n")
+        finally:
+            for f in files:
+                f.close()
+
+        try:
+            for path in paths:
+                with open(path, "r", buffering=self.config.writeBufferSize) as f:
+                    yield from ProteusDeduplicator(self.config, self.memory_budget, "sort").dedup(line.rstrip("\n") for line in f)
+                os.remove(path)
+        finally:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # Yields every item the first time it is seen, so candidates can be consumed while they are still being generated.
+    # With the bloom backend memory stays within the budget, otherwise every item is remembered exactly, so memory grows with the amount of unique items
+    def stream(self, items: Iterable[str]) -> Iterator[str]:
+        if self.backend == "bloom":
+            yield from self._dedup_bloom(items)
+            return
+        seen = set()
+        for item in items:
+            if item not in seen:
+                seen.add(item)
+                yield item
+
+    def _spill(self, seen: set[str]):
+        fd, path = tempfile.mkstemp(prefix="proteus_dedup_run_", suffix=".txt", dir=os.getcwd())
+        with os.fdopen(fd, "w", buffering=self.config.writeBufferSize) as f:
+            batch = []
+            for item in sorted(seen):
+                batch.append(item)
+                if len(batch) >= 65536:
+                    f.write("\n".join(batch) + "\n")
+                    batch.clear()
+            if batch:
+                f.write("\n".join(batch) + "\n")
+        self.run_files.append(path)
+
+    # Merges files that are each sorted into a single sorted stream without duplicates. Memory use is one line per file
+    def merge_sorted_files(self, paths: list[str], remove: bool = False) -> Iterator[str]:
+        files = [open(p, "r", buffering=self.config.writeBufferSize) for p in paths]
+        try:
+            last = None
+            for line in heapq.merge(*files):
+                line = line.rstrip("\n")
+                if line and line != last:
+                    yield line
+                    last = line
+        finally:
+            for f in files:
+                f.close()
+            if remove:
+                for p in paths:
+                    os.remove(p)
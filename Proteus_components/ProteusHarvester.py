@@ -1,31 +1,31 @@
 import os
-import re
 from collections import Counter
+from typing import Optional
 
 from ProteusConfig import ProteusConfig, ErrorMessages
+from ProteusIngest import ProteusIngest
 
 
 class ProteusHarvester:
     def __init__(self, config: ProteusConfig):
         self.config = config
         self.harvestCounter = Counter() # harvested words, along with how many times they appear. This does not automatically sort by rank (use .most_common())
+        self.domain_count = 0           # amount of valid domains harvested
     
-    def harvest(self):
-        # open the file
-        with open(self.config.file, "r") as f:
-            for line in f:
-                line = line.strip().lower()
-                if not re.fullmatch(r'[a-z0-9\-.]+', line): # Filters empty lines, comments, and invalid (anything not a-z 0-9 - . (allowed character of a domain))
-                    continue
-                
-                # split line into pieces and write to a counter
-                parts = line.split(".")
-                for p in parts:
-                    p = p.strip()
-                    if p:
-                        self.harvestCounter[p] += 1
+    # The input is read by the shared ingest stage, which counts the labels in the same pass that collects the input domains
+    def harvest(self, ingest: Optional[ProteusIngest] = None):
+        if ingest is None:
+            ingest = ProteusIngest(self.config)
+            ingest.count_labels = True
+            ingest.ingest()
+        self.harvestCounter = ingest.label_counts
+        self.domain_count = ingest.valid_count
 
     def write_harvest_ranking(self):
+        # a resumed run already wrote the ranking before, and a plan does not write anything
+        if (self.config.resume and os.path.exists(self.config.harvesterOutput)) or self.config.plan:
+            return
+
         # check if harvester output file already exists
         if os.path.exists(self.config.harvesterOutput):
             raise FileExistsError(ErrorMessages.FILE_ALREADY_EXISTS.format(self.config.harvesterOutput))
@@ -0,0 +1,62 @@
+from typing import Iterable
+
+from ProteusAsyncResolver import ProteusDNSResult
+
+
+# Names that do not exist, stored label by label from the TLD down. By RFC 8020 an NXDOMAIN answer means that nothing exists
+# below the name either, so a stored name covers every name below it. Names below a stored name are not stored themselves
+class ProteusSuffixTrie:
+    def __init__(self):
+        self.root: dict = {}
+        self.count = 0
+
+    def add(self, name: str):
+        node = self.root
+        for label in reversed(name.split(".")):
+            if "" in node: # already covered by a stored parent
+                return
+            node = node.setdefault(label, {})
+        if "" not in node:
+            node.clear() # names stored below are covered by this one now
+            node[""] = True
+            self.count += 1
+
+    # True if the name or one of its parents is stored
+    def covers(self, name: str) -> bool:
+        node = self.root
+        for label in reversed(name.split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if "" in node:
+                return True
+        return False
+
+    # Stores the names the result says do not exist. An NXDOMAIN answer with a CNAME is about the target of the CNAME, not the name
+    def add_result(self, result: ProteusDNSResult):
+        if result.status == "NXDOMAIN" and not result.cname:
+            self.add(result.name)
+
+
+# Levels of the candidates for hierarchical resolving. The known domains and all of their parents exist, the level of a candidate
+# is the amount of labels in front of its longest known parent. "a.b.word.c.example.com" with c.example.com known is at level 3,
+# below the level 1 name "word.c.example.com": if that does not exist, neither does the candidate
+class ProteusCandidateLevels:
+    def __init__(self, known_domains: Iterable[str]):
+        self.known: set[str] = set()
+        for domain in known_domains:
+            parts = domain.split(".")
+            for i in range(len(parts)):
+                self.known.add(".".join(parts[i:]))
+
+    def level(self, name: str) -> int:
+        parts = name.split(".")
+        for i in range(1, len(parts)):
+            if ".".join(parts[i:]) in self.known:
+                return i
+        return len(parts)
+
+    # The level 1 parent of a name at the given level
+    @staticmethod
+    def pivot(name: str, level: int) -> str:
+        return name.split(".", level - 1)[-1]
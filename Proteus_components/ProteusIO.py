@@ -0,0 +1,146 @@
+import gzip
+import io
+from typing import BinaryIO, Iterable, Iterator
+
+try:
+    import zstandard
+except ImportError: # optional, only needed for .zst files
+    zstandard = None
+
+
+# Files of domain names are read and written in the format their name ends in:
+#   .gz   gzip compressed
+#   .zst  zstd compressed (requires the zstandard package)
+#   .pfc  compact binary format (front coding, see ProteusFrontCodedWriter), which can be compressed as well (.pfc.gz, .pfc.zst)
+# any other file is plain text with a domain per line
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+BINARY_EXTENSION = ".pfc"
+BINARY_MAGIC = b"PROTEUSFC1\n"
+MAX_NAME_LENGTH = 253   # longest valid domain name, longer names can never resolve
+
+
+def file_format(path: str) -> tuple[str, bool]:
+    lower = path.lower()
+    compression = None
+    for extension, name in COMPRESSIONS.items():
+        if lower.endswith(extension):
+            compression = name
+            lower = lower[:-len(extension)]
+    return compression, lower.endswith(BINARY_EXTENSION)
+
+
+def is_plain_text(path: str) -> bool:
+    return file_format(path) == (None, False)
+
+
+# Adds a tag to a file name in front of the format extensions, so the tagged file keeps the format: generated.txt.gz -> generated.round2.txt.gz
+def tag_path(path: str, tag: str) -> str:
+    compression, binary = file_format(path)
+    suffix = ""
+    for extension, name in COMPRESSIONS.items():
+        if name == compression:
+            suffix = path[-len(extension):]
+    rest = path[:len(path) - len(suffix)]
+    dot = rest.rfind(".")
+    if dot <= rest.rfind("/"):
+        return f"{rest}.{tag}{suffix}"
+    return f"{rest[:dot]}.{tag}{rest[dot:]}{suffix}"
+
+
+def _open_raw(path: str, mode: str, compression: str, buffer_size: int) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.open(path, mode + "b", compresslevel=3) # low levels keep up with the permutator and still compress domain lists well
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("reading or writing .zst files requires the zstandard package (pip install zstandard)")
+        f = open(path, mode + "b")
+        if mode == "w":
+            return zstandard.ZstdCompressor(level=3).stream_writer(f, closefd=True)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f, closefd=True), buffer_size)
+    return open(path, mode + "b", buffering=buffer_size)
+
+
+# Writes batches of domain names in the format of format_path (the path itself by default). Writing to a temporary file in the format of the final file is done by passing the final file as format_path
+class ProteusNameWriter:
+    def __init__(self, path: str, buffer_size: int = 1048576, format_path: str = None):
+        compression, binary = file_format(format_path if format_path is not None else path)
+        self.file = _open_raw(path, "w", compression, buffer_size)
+        self.encoder = ProteusFrontCodedWriter(self.file) if binary else None
+        self.count = 0
+
+    # Names longer than a valid domain name are left out, in every format (they would not fit a front coded record either)
+    def write(self, names: list[str]):
+        if names and max(map(len, names)) > MAX_NAME_LENGTH:
+            names = [name for name in names if len(name) <= MAX_NAME_LENGTH]
+        if not names:
+            return
+        if self.encoder is not None:
+            self.encoder.write(names)
+        else:
+            self.file.write(("\n".join(names) + "\n").encode())
+        self.count += len(names)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Yields the domain names of a file written in any of the formats
+def read_names(path: str, buffer_size: int = 1048576) -> Iterator[str]:
+    compression, binary = file_format(path)
+    with _open_raw(path, "r", compression, buffer_size) as f:
+        if binary:
+            yield from ProteusFrontCodedWriter.read(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line.decode()
+
+
+# Front coding: every name is stored as the length of the prefix it shares with the previous name, and the rest of the name.
+# Sorted candidates share most of their characters with the previous candidate, so a record is only a few bytes long
+# record: shared prefix length (1 byte), suffix length (1 byte), suffix. Domain names are at most 253 characters
+class ProteusFrontCodedWriter:
+    def __init__(self, f: BinaryIO):
+        self.file = f
+        self.previous = b""
+        self.file.write(BINARY_MAGIC)
+
+    def write(self, names: Iterable[str]):
+        out = bytearray()
+        previous = self.previous
+        for name in names:
+            current = name.encode()
+            # longest common prefix by binary search on slice comparisons, which run in C
+            low, high = 0, min(len(previous), len(current), 255)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if previous[:middle] == current[:middle]:
+                    low = middle
+                else:
+                    high = middle - 1
+            suffix = current[low:]
+            out.append(low)
+            out.append(len(suffix))
+            out += suffix
+            previous = current
+        self.previous = previous
+        self.file.write(out)
+
+    @staticmethod
+    def read(f: BinaryIO) -> Iterator[str]:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError("not a proteus front coded file")
+        previous = b""
+        while header := f.read(2):
+            if len(header) < 2:
+                raise ValueError("truncated proteus front coded file")
+            current = previous[:header[0]] + f.read(header[1])
+            yield current.decode()
+            previous = current
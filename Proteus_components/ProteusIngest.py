@@ -0,0 +1,55 @@
+import sys
+from collections import Counter
+from typing import BinaryIO, Iterator
+
+from ProteusConfig import ProteusConfig
+
+
+DOMAIN_BYTES = b"abcdefghijklmnopqrstuvwxyz0123456789-." # allowed characters of a domain, after lowering
+
+
+# Single pass over the input. The input files (or stdin) are read once in large binary chunks and validated at byte level,
+# producing both the deduplicated input domains for the permutator and the label frequencies for the harvester
+class ProteusIngest:
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+        self.read_size = 4 * 1024 * 1024    # bytes read per chunk
+        self.count_labels = config.harvest  # label frequencies are only needed for harvesting
+        self.domains: set[str] = set()
+        self.label_counts = Counter()       # labels along with how many times they appear, duplicate lines included (like the harvester always counted)
+        self.line_count = 0                 # lines read
+        self.valid_count = 0                # valid domain lines read, duplicates included
+
+    # Decoding, splitting and counting are done per chunk on all valid lines at once, which keeps the per-line work in C
+    def ingest(self):
+        for lines in self._read_lines():
+            self.line_count += len(lines)
+            # lines only containing allowed characters are left empty by the translation. Filters empty lines, comments, and invalid lines
+            valid = [line for line in lines if line and not line.translate(None, DOMAIN_BYTES)]
+            if not valid:
+                continue
+            self.valid_count += len(valid)
+            text = b"\n".join(valid).decode("ascii")
+            self.domains.update(text.split("\n"))
+            if self.count_labels:
+                # labels are counted in reading order, so labels with equal counts keep the ranking order of reading line by line
+                self.label_counts.update(text.replace("\n", ".").split("."))
+        self.label_counts.pop("", None) # empty labels of lines like "a..com"
+
+    # Yields the stripped, lowered lines of every input, a chunk at a time
+    def _read_lines(self) -> Iterator[list[bytes]]:
+        for path in self.config.inputFiles or [self.config.file]:
+            if path == "-":
+                yield from self._read_chunks(sys.stdin.buffer)
+            else:
+                with open(path, "rb") as f:
+                    yield from self._read_chunks(f)
+
+    def _read_chunks(self, f: BinaryIO) -> Iterator[list[bytes]]:
+        rest = b""
+        while chunk := f.read(self.read_size):
+            lines = (rest + chunk).lower().split(b"\n")
+            rest = lines.pop() # the last line might continue in the next chunk
+            yield [line.strip() for line in lines]
+        if rest:
+            yield [rest.strip()]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import argparse
+import itertools
+import os
+import sys
+
+from ProteusConfig import ProteusConfig
+from ProteusDeduplicator import ProteusDeduplicator
+from ProteusIO import ProteusNameWriter, read_names
+
+
+# Combines the result files of the nodes of a sharded run (--shard) into a single sorted file without duplicates. The files
+# are streamed through the external sort of the deduplicator, so memory stays within the memory budget however large the
+# files are. Every file can be in any of the formats of ProteusIO, and the output is written in the format its name ends in
+def merge(paths: list[str], output: str, memory_budget: int = 512) -> int:
+    config = ProteusConfig(file="-", memoryBudget=memory_budget, silent=True)
+    names = itertools.chain.from_iterable(read_names(path, config.writeBufferSize) for path in paths)
+    batch = []
+    with ProteusNameWriter(output, config.writeBufferSize) as writer:
+        for name in ProteusDeduplicator(config, backend="sort").dedup(names):
+            batch.append(name)
+            if len(batch) >= 65536:
+                writer.write(batch)
+                batch.clear()
+        writer.write(batch)
+    return writer.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the result files of the nodes of a sharded Proteus run into a single sorted file without duplicates")
+    parser.add_argument("files", type=str, nargs="+", help="the result files to merge (.txt, .gz, .zst or .pfc)")
+    parser.add_argument("-o", "--output", type=str, default="merged_domains.txt", help="set the output file, its name sets the format like the permutator output [DEFAULT: merged_domains.txt]")
+    parser.add_argument("-mb", "--memory-budget", type=int, default=512, help="set the memory budget in MB, beyond it sorted runs are spilled to disk [DEFAULT: 512]")
+    parser.add_argument("--overwrite-files", action="store_true", help="overwrite the output file if it already exists [DEFAULT: False]")
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(os.path.expanduser(p)) for p in args.files]
+    output = os.path.abspath(os.path.expanduser(args.output))
+    for path in paths:
+        if not os.path.isfile(path):
+            parser.error(f"the file does not exist: {path}")
+    if output in paths:
+        parser.error(f"the output file is also an input file: {output}")
+    if os.path.exists(output) and not args.overwrite_files:
+        parser.error(f"the file {output} already exists. Either select a different name for the output file, or enable file overwriting")
+    if args.memory_budget < 1:
+        parser.error(f"the memory budget has to be at least 1 MB: {args.memory_budget}")
+
+    count = merge(paths, output, args.memory_budget)
+    print(f"merged {len(paths)} file(s) into {count} unique domain(s) in {output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import dataclasses
+import json
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+try:
+    import resource
+except ImportError: # not available on windows, peak RSS is then left out
+    resource = None
+
+from ProteusConfig import ProteusConfig
+from ProteusPlanner import format_duration
+
+
+@dataclass
+class ProteusStageMetrics:
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: Optional[int] = None            # peak RSS of proteus itself at the end of the stage
+    peak_child_rss_bytes: Optional[int] = None      # peak RSS of the largest child process (dnsx, workers) at the end of the stage
+    items_in: Optional[int] = None
+    items_out: Optional[int] = None
+
+    @property
+    def rate(self) -> Optional[float]: # items per second, of the output if known, otherwise of the input
+        items = self.items_out if self.items_out is not None else self.items_in
+        if items is None or self.wall_seconds <= 0:
+            return None
+        return items / self.wall_seconds
+
+    def to_dict(self) -> dict:
+        return {**dataclasses.asdict(self), "items_per_second": self.rate}
+
+
+def peak_rss() -> tuple[Optional[int], Optional[int]]:
+    if resource is None:
+        return None, None
+    scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss is in bytes on macOS, in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+
+
+def count_lines(path: str) -> int:
+    lines = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1048576):
+            lines += chunk.count(b"\n")
+    return lines
+
+
+# Records wall time, CPU time, peak RSS and item counts of every stage of a run. The stages are written to the stats file
+# (if set) at the end of the run, and streamed stages show a live progress line with an ETA
+class ProteusMetrics:
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+        self.stages: list[ProteusStageMetrics] = []
+        self.expected: dict[str, int] = {}      # expected amount of items per streamed stage, used for the ETA (see ProteusPlanner)
+        self.progress_interval = 1.0            # seconds between updates of the progress line
+        self.progress_check = 65536             # items between checks of the clock
+        self.show_progress = not config.silent and sys.stderr.isatty()
+        self.started = time.time()
+        self.cpu_started = time.process_time()  # the CPU time spent before the run (interpreter start and imports) is left out
+
+    # Streamed stages cost an extra generator step per item, so they are only tracked if anything reports them
+    @property
+    def enabled(self) -> bool:
+        return self.config.statsFile is not None or self.config.verbose or self.show_progress
+
+    @contextmanager
+    def stage(self, name: str, items_in: Optional[int] = None) -> Iterator[ProteusStageMetrics]:
+        stage = ProteusStageMetrics(name, items_in=items_in)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_seconds = time.perf_counter() - wall
+            stage.cpu_seconds = time.process_time() - cpu
+            stage.peak_rss_bytes, stage.peak_child_rss_bytes = peak_rss()
+            self.stages.append(stage)
+            if self.config.verbose:
+                rate = f", {stage.rate:.0f} items/s" if stage.rate is not None else ""
+                print(f"stage {name} took {stage.wall_seconds:.2f}s ({stage.cpu_seconds:.2f}s cpu{rate})")
+
+    # Passes the items through while recording them as a stage. The stage runs from the first item to the last, so for
+    # lazily consumed items it includes the work the consumer does per item (like the set insertions of the deduplicator)
+    def track(self, name: str, items: Iterable, items_in: Optional[int] = None) -> Iterator:
+        total = self.expected.get(name)
+        count = 0
+        iterator = iter(items)
+        first = next(iterator, _END)
+        if first is _END:
+            self.stages.append(ProteusStageMetrics(name, items_in=items_in, items_out=0))
+            return
+
+        with self.stage(name, items_in) as stage:
+            yield first
+            count = 1
+            last_update = time.perf_counter()
+            started = last_update
+            for item in iterator:
+                yield item
+                count += 1
+                if self.show_progress and count % self.progress_check == 0:
+                    now = time.perf_counter()
+                    if now - last_update >= self.progress_interval:
+                        self.print_progress(name, count, total, now - started)
+                        last_update = now
+            stage.items_out = count
+            if self.show_progress and last_update != started:
+                sys.stderr.write("\n")
+
+    def print_progress(self, name: str, count: int, total: Optional[int], elapsed: float):
+        rate = count / max(elapsed, 1e-9)
+        line = f"\r{name}: {count} items, {rate:.0f}/s"
+        if total:
+            remaining = max(0, total - count)
+            line += f", {min(100.0, 100 * count / total):.1f}% done, eta {format_duration(math.ceil(remaining / rate))}"
+        sys.stderr.write(line + "   ")
+        sys.stderr.flush()
+
+    def summary(self) -> dict:
+        rss, child_rss = peak_rss()
+        return {
+            "started": self.started,
+            "wall_seconds": time.time() - self.started,
+            "cpu_seconds": time.process_time() - self.cpu_started,
+            "peak_rss_bytes": rss,
+            "peak_child_rss_bytes": child_rss,
+            "config": dataclasses.asdict(self.config),
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+
+    # The stats file is replaced atomically, like the checkpoint manifest
+    def write(self):
+        if self.config.statsFile is None:
+            return
+        tmp_path = self.config.statsFile + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        os.replace(tmp_path, self.config.statsFile)
+        if not self.config.silent:
+            print(f"wrote run statistics to {self.config.statsFile}")
+
+
+_END = object()
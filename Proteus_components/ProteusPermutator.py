@@ -1,9 +1,19 @@
+import itertools
+import multiprocessing
 import os
-import re
-import subprocess
-from typing import Optional
+import zlib
+from collections import Counter
+from typing import Iterable, Iterator, Optional
 
+from ProteusCheckpoint import ProteusCheckpoint
 from ProteusConfig import ProteusConfig, ErrorMessages
+from ProteusDeduplicator import ProteusDeduplicator
+from ProteusIngest import ProteusIngest
+from ProteusIO import ProteusNameWriter
+from ProteusMetrics import ProteusMetrics
+from ProteusRanker import ProteusRanker
+from ProteusState import ProteusRunState
+from ProteusWildcard import ProteusWildcardDetector
 
 
 class ProteusPermutator:
@@ -11,8 +21,22 @@ class ProteusPermutator:
         self.config = config
         self.permutators: set[str] = set()
         self.input_domains: set[str] = set()
-        self.generated_domains: set[str] = set()
-        self.low_ram_buffer_file: str = "proteus_permutator_lowram_buffer.txt"
+        self.wildcards: Optional[ProteusWildcardDetector] = None    # if set, candidates below wildcard zones are skipped
+        self.metrics: Optional[ProteusMetrics] = None               # if set, every strategy and the deduplication are recorded as stages
+        self.baselist_rank: dict[str, int] = {}     # position of every baselist word in the baselist, used for ranking
+        self.harvest_counts = Counter()              # harvest frequencies of the words, used for ranking
+        self.previous_state: Optional[ProteusRunState] = None  # if set, only the delta against this earlier run is generated
+        self.trimmed: dict[str, set[str]] = {}      # words left out of every strategy for their low hit rate (see ProteusWordStats)
+        self.write_batch_size = 65536   # amount of candidates joined into a single write
+        self.generated_count: Optional[int] = None  # amount of domains written by write_generated_domains
+        self.checkpoint_chunk_size = 1000   # input domains per chunk when checkpointing, a crash never costs more than one chunk
+        self.strategy_order = ["simple", "hyphenate", "insert", "append-hyphenate"]
+        self.strategies = {
+            "simple": self.permutate_simple,
+            "hyphenate": self.permutate_hyphenate,
+            "insert": self.permutate_insertion,
+            "append-hyphenate": self.permutate_append_hyphenate,
+        }
 
     
     def build_permutator_set(self, harvested_words: Optional[list[str]] = None):
@@ -25,6 +49,7 @@ class ProteusPermutator:
                     word = word.strip().lower()
                     if word:
                         self.permutators.add(word)
+                        self.baselist_rank.setdefault(word, len(self.baselist_rank))
 
         if self.config.harvest:
             i = 0
@@ -36,181 +61,334 @@ class ProteusPermutator:
                     i += 1
 
     
-    def read_input_domains(self):
-        with open(self.config.file, "r") as f:
-            for line in f:
-                line = line.strip().lower()
-                if not re.fullmatch(r'[a-z0-9\-.]+', line): # Filters empty lines, comments, and invalid (anything not a-z 0-9 - . (allowed character of a domain))
-                    continue
-                self.input_domains.add(line)
+    # Takes the input domains from the shared ingest stage, so the input is only read once when harvesting as well
+    def read_input_domains(self, ingest: Optional[ProteusIngest] = None):
+        if ingest is None:
+            ingest = ProteusIngest(self.config)
+            ingest.count_labels = False
+            ingest.ingest()
+        self.input_domains = ingest.domains
 
     
-    def permutate_simple_actions(self):
+    # Yields the candidates of every selected strategy. This is the single engine all strategies stream through, nothing is held in memory here
+    # Only the given domains are permutated if set (used by the workers of the parallel mode), otherwise all input domains are.
+    # Likewise only the given words and strategies are used if set (used by delta generation), otherwise all permutator words and selected strategies are
+    def permutate(self, domains: Optional[Iterable[str]] = None, words: Optional[Iterable[str]] = None, strategies: Optional[list[str]] = None) -> Iterator[str]:
         if not self.permutators:
             self.build_permutator_set()
+        if domains is None:
+            domains = self.input_domains
 
-        seps = []
-        if "simple" in self.config.permutationStrategy:
-            seps.append(".")
-        if "hyphenate" in self.config.permutationStrategy:
-            seps.append("-")
-        
-        if not seps:
-            return
-        
-        for sep in seps:
-            for domain in self.input_domains:
-                for perm in self.permutators:
-                    gen = f"{perm}{sep}{domain}".strip().lower()
-                    if gen not in self.input_domains:
-                        if sep == "." or (sep == "-" and len(domain.strip().split(".")) >= 3):
-                            self.generated_domains.add(gen)
-    
-    def permutate_insertion(self):
-        if not self.permutators:
-            self.build_permutator_set()
-        
-        if "insert" not in self.config.permutationStrategy:
-            return
+        if strategies is None:
+            strategies = self.config.permutationStrategy
+
+        input_domains = self.input_domains
+        wildcards = self.wildcards
+        for strategy in self.strategy_order:
+            if strategy not in strategies:
+                continue
+            strategy_words = words
+            if self.trimmed.get(strategy):
+                strategy_words = [w for w in (self.permutators if words is None else words) if w not in self.trimmed[strategy]]
+            generated = self.strategies[strategy](domains, strategy_words)
+            if self.metrics is not None:
+                generated = self.metrics.track(strategy, generated, len(domains))
+            if wildcards is None:
+                generated = (gen for gen in generated if gen not in input_domains)
+            else:
+                generated = (gen for gen in generated if gen not in input_domains and not wildcards.is_wildcarded(gen))
+            yield from self.shard_filter(generated)
+
+    # Keeps only the candidates of the shard of this node if the candidate space is sharded (--shard). A candidate belongs to
+    # the shard its name hashes to, so every name is generated by exactly one node, whichever domain, word and strategy produce it
+    def shard_filter(self, candidates: Iterable[str]) -> Iterable[str]:
+        shard_count = self.config.shardCount
+        if shard_count <= 1:
+            return candidates
+        shard = self.config.shardIndex - 1
+        return (gen for gen in candidates if zlib.crc32(gen.encode()) % shard_count == shard)
 
-        for domain in self.input_domains:
-            for perm in self.permutators:
-                parts = domain.split(".")
-                if len(parts) <= 2:
-                    continue
-                insertions = len(parts) - 2 # insertions are done after every part except for domain and TLD
-                insertions_done = 0
-                while insertions_done < insertions:
-                    position = insertions_done + 1
-                    gen = parts.copy()
-                    gen.insert(position, perm)
-                    res = ".".join(gen)
-                    
-                    if res not in self.input_domains:
-                        self.generated_domains.add(res)
-                    insertions_done += 1
-
-    def permutate_append_hyphenate(self):
+    # Yields only the candidates that the earlier run of the previous state did not generate: the new domains with all words,
+    # the known domains with the new words, and the known domains with the known words for strategies that are new
+    def permutate_delta(self) -> Iterator[str]:
         if not self.permutators:
             self.build_permutator_set()
-        
-        if "append-hyphenate" not in self.config.permutationStrategy:
-            return
+        previous = self.previous_state
+        known_domains = [d for d in self.input_domains if d in previous.domains]
+        new_domains = [d for d in self.input_domains if d not in previous.domains]
+        known_words = [w for w in self.permutators if w in previous.words]
+        new_words = [w for w in self.permutators if w not in previous.words]
+        new_strategies = [s for s in self.config.permutationStrategy if s not in previous.strategies]
 
-        for domain in self.input_domains:
-            for perm in self.permutators:
-                parts = domain.split(".")
-                if len(parts) <= 2:
-                    continue
-                appends = len(parts) - 2
-                appends_done = 0
-                while appends_done < appends:
-                    gen = parts.copy()
-                    gen[appends_done] += f"-{perm}"
-                    res = ".".join(gen)
-                    
-                    if res not in self.input_domains:
-                        self.generated_domains.add(res)
-                    appends_done += 1
-    
-    # The following few methods are the low-ram alternatives to the earlier methods. They function similarly, but are separate methods for clarity. Low-ram methods start with the "lr_" prefix
-    def lr_permutate_simple_actions(self):
+        if not self.config.silent:
+            print(f"generating the delta against the previous run: {len(new_domains)} new domain(s), {len(new_words)} new word(s), {len(new_strategies)} new strategies")
+
+        if new_domains:
+            yield from self.permutate(new_domains)
+        if known_domains and new_words:
+            yield from self.permutate(known_domains, new_words)
+        if known_domains and known_words and new_strategies:
+            yield from self.permutate(known_domains, known_words, new_strategies)
+
+    # The snapshot of this run, for a later delta run
+    def run_state(self) -> ProteusRunState:
+        return ProteusRunState(set(self.input_domains), set(self.permutators), list(self.config.permutationStrategy))
+
+    # Yields the unique candidates best-first (see ProteusRanker), until the query budget is spent if one is set
+    def permutate_ranked(self) -> Iterator[str]:
         if not self.permutators:
             self.build_permutator_set()
 
-        seps = []
-        if "simple" in self.config.permutationStrategy:
-            seps.append(".")
-        if "hyphenate" in self.config.permutationStrategy:
-            seps.append("-")
-        
-        if not seps:
+        candidates = ProteusRanker(self).candidates()
+        candidates = self.shard_filter(gen for gen in candidates if gen not in self.input_domains)
+        if self.wildcards is not None:
+            candidates = (gen for gen in candidates if not self.wildcards.is_wildcarded(gen))
+        # the exact deduplication remembers every unique candidate, which is only bounded by a query budget. Without a budget,
+        # low-ram mode uses the bloom filter of the memory budget instead (a fraction of the candidates is lost, see --dedup-fp-rate)
+        backend = "bloom" if self.config.lowRamMode and self.config.maxQueries is None else None
+        unique = ProteusDeduplicator(self.config, backend=backend).stream(candidates)
+        if self.config.maxQueries is not None:
+            unique = itertools.islice(unique, self.config.maxQueries)
+        return unique
+
+    # Every strategy does the per-domain work (splitting and joining the labels) once per domain, and builds the candidates
+    # of a domain in a single comprehension, so a candidate costs a single string concatenation
+    def permutate_simple(self, domains: Iterable[str], words: Optional[Iterable[str]] = None) -> Iterator[str]:
+        permutators = tuple(self.permutators if words is None else words)
+        for domain in domains:
+            suffix = "." + domain
+            yield from [perm + suffix for perm in permutators]
+
+    def permutate_hyphenate(self, domains: Iterable[str], words: Optional[Iterable[str]] = None) -> Iterator[str]:
+        permutators = tuple(self.permutators if words is None else words)
+        for domain in domains:
+            if domain.count(".") < 2: # hyphenating the registered domain itself would generate a different domain
+                continue
+            suffix = "-" + domain
+            yield from [perm + suffix for perm in permutators]
+
+    def permutate_insertion(self, domains: Iterable[str], words: Optional[Iterable[str]] = None) -> Iterator[str]:
+        permutators = tuple(self.permutators if words is None else words)
+        for domain in domains:
+            fragments = self.insertion_fragments(domain)
+            if fragments:
+                yield from [head + perm + tail for perm in permutators for head, tail in fragments]
+
+    def permutate_append_hyphenate(self, domains: Iterable[str], words: Optional[Iterable[str]] = None) -> Iterator[str]:
+        permutators = tuple(self.permutators if words is None else words)
+        for domain in domains:
+            fragments = self.append_fragments(domain)
+            if fragments:
+                yield from [head + perm + tail for perm in permutators for head, tail in fragments]
+
+    # The labels in front of and behind every insertion position, including the separators. Insertions are done after every
+    # label except for the domain and TLD: "a.b.example.com" gives ("a.", ".b.example.com") and ("a.b.", ".example.com")
+    @staticmethod
+    def insertion_fragments(domain: str) -> list[tuple[str, str]]:
+        parts = domain.split(".")
+        return [(".".join(parts[:position]) + ".", "." + ".".join(parts[position:])) for position in range(1, len(parts) - 1)]
+
+    # The labels up to and including every appended label, and the labels behind it: "a.b.example.com" gives ("a-", ".b.example.com") and ("a.b-", ".example.com")
+    @staticmethod
+    def append_fragments(domain: str) -> list[tuple[str, str]]:
+        parts = domain.split(".")
+        return [(".".join(parts[:position + 1]) + "-", "." + ".".join(parts[position + 1:])) for position in range(len(parts) - 2)]
+
+    # The (word, strategy, input domain) that generate a candidate, found by reversing the strategies in strategy order, so a
+    # candidate generated by several strategies is explained by the first one that generates it. None if nothing generates it
+    def explain(self, name: str) -> Optional[tuple[str, str, str]]:
+        parts = name.split(".")
+        permutators = self.permutators
+        input_domains = self.input_domains
+        for strategy in self.strategy_order:
+            if strategy not in self.config.permutationStrategy:
+                continue
+            if strategy == "simple":
+                domain = ".".join(parts[1:])
+                if parts[0] in permutators and domain in input_domains:
+                    return parts[0], strategy, domain
+            elif strategy == "hyphenate" and len(parts) > 2: # see permutate_hyphenate
+                rest = ".".join(parts[1:])
+                for i, c in enumerate(parts[0]):
+                    if c == "-" and parts[0][:i] in permutators and (domain := parts[0][i + 1:] + "." + rest) in input_domains:
+                        return parts[0][:i], strategy, domain
+            elif strategy == "insert":
+                for position in range(1, len(parts) - 2):
+                    domain = ".".join(parts[:position] + parts[position + 1:])
+                    if parts[position] in permutators and domain in input_domains:
+                        return parts[position], strategy, domain
+            elif strategy == "append-hyphenate":
+                for position in range(len(parts) - 2):
+                    label = parts[position]
+                    for i, c in enumerate(label):
+                        if c == "-" and label[i + 1:] in permutators and (domain := ".".join(parts[:position] + [label[:i]] + parts[position + 1:])) in input_domains:
+                            return label[i + 1:], strategy, domain
+        return None
+
+    # Streams the deduplicated candidates to the output file in large chunks. Memory is bounded by the memory budget, not by the amount of candidates
+    def write_generated_domains(self, checkpoint: Optional[ProteusCheckpoint] = None):
+        if checkpoint is not None:
+            self.write_generated_domains_checkpointed(checkpoint)
             return
-        
-        with open(self.low_ram_buffer_file, "a") as buf:
-            for sep in seps:
-                for domain in self.input_domains:
-                    for perm in self.permutators:
-                        gen = f"{perm}{sep}{domain}".strip().lower()
-                        if gen not in self.input_domains:
-                            if sep == "." or (sep == "-" and len(domain.strip().split(".")) >= 3):
-                                buf.write(gen + "\n")
-    
-    def lr_permutate_insertion(self):
+
+        # check if generated domains output file already exists
+        if os.path.exists(self.config.permutatorOutput):
+            raise FileExistsError(ErrorMessages.FILE_ALREADY_EXISTS.format(self.config.permutatorOutput))
+
+        if self.config.ranked:
+            generated = self.permutate_ranked()
+        elif self.previous_state is not None: # a delta is small, so it is generated serially
+            generated = ProteusDeduplicator(self.config).dedup(self.permutate_delta())
+        elif self.config.workers > 1:
+            generated = self.permutate_parallel()
+        else:
+            generated = ProteusDeduplicator(self.config).dedup(self.permutate())
+        if self.metrics is not None:
+            generated = self.metrics.track("dedup", generated)
+        self.generated_count = self._write_batched(self.config.permutatorOutput, generated)
+
+    # returns the amount of lines written. The file is written in the format of format_path (see ProteusIO), plain text for intermediate files
+    def _write_batched(self, path: str, lines: Iterable[str], format_path: Optional[str] = None) -> int:
+        with ProteusNameWriter(path, self.config.writeBufferSize, format_path if format_path is not None else path) as writer:
+            batch = []
+            for line in lines:
+                batch.append(line)
+                if len(batch) >= self.write_batch_size:
+                    writer.write(batch)
+                    batch.clear()
+            writer.write(batch)
+        return writer.count
+
+    # Splits the input domains over worker processes. Every worker streams the sorted, deduplicated candidates of its shards
+    # to its own shard files, which are merged and deduplicated at the end. The result is identical to the serial path
+    def permutate_parallel(self) -> Iterator[str]:
         if not self.permutators:
             self.build_permutator_set()
-        
-        if "insert" not in self.config.permutationStrategy:
+
+        workers = self.config.workers
+        domains = sorted(self.input_domains)
+        shard_count = workers * 4 # more shards than workers, so workers that finish early pick up the remaining shards
+        shards = [(f"proteus_permutator_shard_{i}.txt", domains[i::shard_count]) for i in range(shard_count) if domains[i::shard_count]]
+
+        if not self.config.silent:
+            print(f"permutating {len(domains)} domains in {len(shards)} shards over {workers} workers")
+
+        shard_files = list(self._permutate_shards(shards))
+        yield from ProteusDeduplicator(self.config).merge_sorted_files(shard_files, remove=True)
+
+    # Yields the path of every shard as soon as it is completed. Shards are permutated by a process pool if there are multiple workers
+    def _permutate_shards(self, shards: list[tuple[str, list[str]]]) -> Iterator[str]:
+        if self.config.workers <= 1:
+            _init_shard_worker(self.config, self.permutators, self.input_domains, self.wildcards, self.trimmed)
+            for shard in shards:
+                yield _permutate_shard(shard)
             return
-        
-        with open(self.low_ram_buffer_file, "a") as buf:
-            for domain in self.input_domains:
-                for perm in self.permutators:
-                    parts = domain.split(".")
-                    if len(parts) <= 2:
-                        continue
-                    insertions = len(parts) - 2 # insertions are done after every part except for domain and TLD
-                    insertions_done = 0
-                    while insertions_done < insertions:
-                        position = insertions_done + 1
-                        gen = parts.copy()
-                        gen.insert(position, perm)
-                        res = ".".join(gen)
-                        
-                        if res not in self.input_domains:
-                            buf.write(res + "\n")
-                        insertions_done += 1
-                    
-    def lr_permutate_append_hyphenate(self):
+
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        with context.Pool(self.config.workers, initializer=_init_shard_worker, initargs=(self.config, self.permutators, self.input_domains, self.wildcards, self.trimmed)) as pool:
+            yield from pool.imap_unordered(_permutate_shard, shards)
+
+    # Checkpointed version of write_generated_domains. The sorted input domains are permutated in chunks, and every completed
+    # chunk is recorded in the checkpoint manifest, so a resumed run only redoes the chunks that were not completed yet
+    def write_generated_domains_checkpointed(self, checkpoint: ProteusCheckpoint):
         if not self.permutators:
             self.build_permutator_set()
-        
-        if "append-hyphenate" not in self.config.permutationStrategy:
+
+        domains = sorted(self.input_domains)
+        state = checkpoint.section("permutator", checkpoint.signature(
+            domains, sorted(self.permutators), self.config.permutationStrategy, sorted(self.wildcards.wildcards) if self.wildcards else None, self.checkpoint_chunk_size,
+            self.config.ranked, self.config.maxQueries, self.config.shardIndex, self.config.shardCount,
+            (sorted(self.previous_state.domains), sorted(self.previous_state.words), self.previous_state.strategies) if self.previous_state else None))
+        if state.get("done") and os.path.exists(self.config.permutatorOutput):
+            if not self.config.silent:
+                print("permutation was already completed, skipping")
             return
 
-        with open(self.low_ram_buffer_file, "a") as buf:
-            for domain in self.input_domains:
-                for perm in self.permutators:
-                    parts = domain.split(".")
-                    if len(parts) <= 2:
-                        continue
-                    appends = len(parts) - 2
-                    appends_done = 0
-                    while appends_done < appends:
-                        gen = parts.copy()
-                        gen[appends_done] += f"-{perm}"
-                        res = ".".join(gen)
-                        
-                        if res not in self.input_domains:
-                            buf.write(res + "\n")
-                        appends_done += 1
-
-    # Basically just does "sort -u [buffer file] > [output file]" to the buffer file
-    def dedup_lr_buffer(self):
         # check if generated domains output file already exists
         if os.path.exists(self.config.permutatorOutput):
             raise FileExistsError(ErrorMessages.FILE_ALREADY_EXISTS.format(self.config.permutatorOutput))
-        
-        if not self.config.silent:
-            print("deduplicating the low-ram buffer file")
 
-        subprocess.run([
-            "sort", "-u",
-            f"{self.low_ram_buffer_file}",
-            "-o", f"{self.config.permutatorOutput}"
-        ],
-        check=True)
+        # the ranked order runs over all domains at once, so it can not be split into chunks. It is written in a single pass
+        # instead, like a delta, which is small
+        if self.config.ranked or self.previous_state is not None:
+            generated = self.permutate_ranked() if self.config.ranked else ProteusDeduplicator(self.config).dedup(self.permutate_delta())
+            tmp_output = self.config.permutatorOutput + ".tmp"
+            self.generated_count = self._write_batched(tmp_output, generated, self.config.permutatorOutput)
+            os.replace(tmp_output, self.config.permutatorOutput)
+            state["done"] = True
+            checkpoint.save()
+            return
+
+        chunk_files = []
+        todo = []
+        completed = state.setdefault("chunks", [])
+        for i in range(0, len(domains), self.checkpoint_chunk_size):
+            path = f"proteus_permutator_chunk_{i // self.checkpoint_chunk_size}.txt"
+            chunk_files.append(path)
+            if path not in completed or not os.path.exists(path):
+                todo.append((path, domains[i:i + self.checkpoint_chunk_size]))
 
         if not self.config.silent:
-            print("success, removing buffer file")
-        
-        os.remove(self.low_ram_buffer_file)
+            print(f"permutating {len(todo)} of {len(chunk_files)} chunks ({len(chunk_files) - len(todo)} completed earlier)")
+
+        for path in self._permutate_shards(todo):
+            completed.append(path)
+            checkpoint.save()
+
+        # the output is only moved into place once it is complete, so a crash while merging can not leave a partial output behind
+        tmp_output = self.config.permutatorOutput + ".tmp"
+        self.generated_count = self._write_batched(tmp_output, ProteusDeduplicator(self.config).merge_sorted_files(chunk_files), self.config.permutatorOutput)
+        os.replace(tmp_output, self.config.permutatorOutput)
+        state["done"] = True
+        checkpoint.save()
+        for path in chunk_files:
+            os.remove(path)
+
+    # Yields the deduplicated candidates as they are generated, for pipelining them into the resolver. If enabled, the candidates are also written to the output file
+    def stream_generated_domains(self) -> Iterator[str]:
+        if self.config.ranked:
+            generated = self.permutate_ranked() # already deduplicated
+        elif self.previous_state is not None:
+            generated = ProteusDeduplicator(self.config).stream(self.permutate_delta())
+        else:
+            generated = ProteusDeduplicator(self.config).stream(self.permutate())
+        if not self.config.writeGenerated:
+            yield from generated
+            return
 
-    def write_generated_domains(self):
         # check if generated domains output file already exists
         if os.path.exists(self.config.permutatorOutput):
             raise FileExistsError(ErrorMessages.FILE_ALREADY_EXISTS.format(self.config.permutatorOutput))
-        
-        with open(self.config.permutatorOutput, "w") as f:
-            for l in self.generated_domains:
-                f.write(l + "\n")
\ No newline at end of file
+
+        with ProteusNameWriter(self.config.permutatorOutput, self.config.writeBufferSize) as writer:
+            batch = []
+            for gen in generated:
+                batch.append(gen)
+                if len(batch) >= self.write_batch_size:
+                    writer.write(batch)
+                    batch.clear()
+                yield gen
+            writer.write(batch)
+
+
+# Worker side of the parallel mode. Every worker process gets its own permutator holding the full set of input domains,
+# so candidates that are known input domains are still filtered out
+_shard_permutator: Optional[ProteusPermutator] = None
+
+def _init_shard_worker(config: ProteusConfig, permutators: set[str], input_domains: set[str], wildcards: Optional[ProteusWildcardDetector], trimmed: dict[str, set[str]]):
+    global _shard_permutator
+    _shard_permutator = ProteusPermutator(config)
+    _shard_permutator.permutators = permutators
+    _shard_permutator.input_domains = input_domains
+    _shard_permutator.wildcards = wildcards
+    _shard_permutator.trimmed = trimmed
+
+# Shards are written to a temporary file first, so a shard file only exists once it is complete
+def _permutate_shard(shard: tuple[str, list[str]]) -> str:
+    path, domains = shard
+    config = _shard_permutator.config
+    # the shards are merged assuming they are sorted, so shards always use the sort backend
+    deduplicator = ProteusDeduplicator(config, memory_budget=max(1, config.memoryBudget // config.workers), backend="sort")
+    _shard_permutator._write_batched(path + ".tmp", deduplicator.dedup(_shard_permutator.permutate(domains)))
+    os.replace(path + ".tmp", path)
+    return path
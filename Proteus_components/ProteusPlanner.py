@@ -0,0 +1,122 @@
+import math
+from typing import Iterable, Optional
+
+from ProteusConfig import ProteusConfig
+
+
+def format_duration(seconds: int) -> str:
+    hours = seconds // 3600
+    remaining = seconds % 3600
+    minutes = remaining // 60
+    seconds = remaining % 60
+
+    parts = []
+    if hours > 0:
+        parts.append(f"hours: {hours}")
+    if minutes > 0:
+        parts.append(f"minutes: {minutes}")
+    if seconds > 0 or not parts:
+        parts.append(f"seconds: {seconds}")
+    return ", ".join(parts)
+
+
+def format_bytes(amount: float) -> str:
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if amount < 1024 or unit == "TB":
+            return f"{amount:.1f}{unit}"
+        amount /= 1024
+
+
+# Computes the amount of candidates every strategy generates in closed form, from the label depths of the input domains
+# and the permutator words, without generating anything. The counts are exact before deduplication, so they are an upper
+# bound of the deduplicated output (strategies can generate the same domain, and known input domains are left out)
+class ProteusPlanner:
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+        self.candidate_cost = 120       # bytes per candidate held in a set while deduplicating (see ProteusDeduplicator)
+        self.resolver_entry_cost = 512  # bytes per domain loaded into dnsx (see ProteusResolver)
+        self.counts: dict[str, int] = {}
+        self.output_bytes: dict[str, int] = {}
+
+    # trimmed gives the words left out of every strategy (see ProteusPermutator.trimmed)
+    def plan(self, domains: Iterable[str], words: Iterable[str], trimmed: Optional[dict[str, set[str]]] = None):
+        words = list(words)
+        word_counts = {}
+        word_bytes = {}
+        for strategy in ["simple", "hyphenate", "insert", "append-hyphenate"]:
+            excluded = trimmed.get(strategy, set()) if trimmed else set()
+            kept = [w for w in words if w not in excluded]
+            word_counts[strategy] = len(kept)
+            word_bytes[strategy] = sum(len(w) for w in kept)
+
+        # per domain only the amount of labels and the length matter, so a single pass over the domains is enough
+        domain_count = 0
+        domain_bytes = 0
+        deep_count = 0          # domains with at least 3 labels (hyphenate)
+        deep_bytes = 0
+        positions = 0           # insertion / append positions over all domains (labels - 2 per domain)
+        position_bytes = 0
+        for domain in domains:
+            labels = domain.count(".") + 1
+            domain_count += 1
+            domain_bytes += len(domain)
+            if labels >= 3:
+                deep_count += 1
+                deep_bytes += len(domain)
+                positions += labels - 2
+                position_bytes += (labels - 2) * len(domain)
+
+        # every candidate is the domain plus the word plus a separator, and a newline in the output file
+        self.counts = {
+            "simple": domain_count * word_counts["simple"],
+            "hyphenate": deep_count * word_counts["hyphenate"],
+            "insert": positions * word_counts["insert"],
+            "append-hyphenate": positions * word_counts["append-hyphenate"],
+        }
+        self.output_bytes = {
+            "simple": word_counts["simple"] * (domain_bytes + 2 * domain_count) + domain_count * word_bytes["simple"],
+            "hyphenate": word_counts["hyphenate"] * (deep_bytes + 2 * deep_count) + deep_count * word_bytes["hyphenate"],
+            "insert": word_counts["insert"] * (position_bytes + 2 * positions) + positions * word_bytes["insert"],
+            "append-hyphenate": word_counts["append-hyphenate"] * (position_bytes + 2 * positions) + positions * word_bytes["append-hyphenate"],
+        }
+        for strategy in list(self.counts):
+            if strategy not in self.config.permutationStrategy:
+                del self.counts[strategy]
+                del self.output_bytes[strategy]
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def print_plan(self):
+        total = self.total
+        total_bytes = sum(self.output_bytes.values())
+        print("permutation plan (upper bound, before deduplication):")
+        for strategy, count in self.counts.items():
+            print(f"  {strategy}: {count} candidates, {format_bytes(self.output_bytes[strategy])}")
+        print(f"  total: {total} candidates, {format_bytes(total_bytes)} written to {self.config.permutatorOutput}")
+        if self.config.shardCount > 1:
+            # names are spread evenly over the shards by hash
+            total = math.ceil(total / self.config.shardCount)
+            total_bytes = total_bytes // self.config.shardCount
+            print(f"  shard {self.config.shardIndex}/{self.config.shardCount}: about {total} candidates, {format_bytes(total_bytes)}")
+        if self.config.maxQueries is not None and self.config.maxQueries < total:
+            # the ranked candidates are about as long as the average candidate
+            total_bytes = total_bytes * self.config.maxQueries // total
+            total = self.config.maxQueries
+            print(f"  ranked generation stops after {total} candidates (--max-queries), {format_bytes(total_bytes)}")
+
+        budget = self.config.memoryBudget * 1024 * 1024
+        lowram_budget = min(budget, 64 * 1024 * 1024) # default budget of low-ram mode
+        print("projected peak memory:")
+        print(f"  permutator: {format_bytes(min(total * self.candidate_cost, budget))} (low-ram mode: {format_bytes(min(total * self.candidate_cost, lowram_budget))})")
+        if self.config.resolve and self.config.resolverBackend == "dnsx":
+            # imported here, as ProteusResolver imports format_duration from this module
+            from ProteusResolver import adaptive_entry_limit
+            chunk = min(total, adaptive_entry_limit(self.config, self.config.checkpointFile is not None)) * max(1, self.config.resolverWorkers)
+            print(f"  dnsx: {format_bytes(total * self.resolver_entry_cost)} (low-ram mode: about {format_bytes(chunk * self.resolver_entry_cost)}, the split size adapts to the available memory)")
+
+        if self.config.rateResolver < 1:
+            print("unable to do a time estimate, as the rate is unlimited")
+        else:
+            print(f"projected resolve time at {self.config.rateResolver} queries/s: {format_duration(math.ceil(total / self.config.rateResolver))}")
@@ -0,0 +1,107 @@
+import heapq
+import math
+from collections import Counter
+from typing import Iterator
+
+from ProteusConfig import ProteusConfig
+
+
+# Scores every (word, domain, strategy) candidate and yields them best-first. The score is the product of
+#   word score      how common the word is: its position in the baselist plus its harvest frequency in the target
+#   zone score      how densely populated the zone is the candidate lands in (the domain itself for simple, its parent otherwise)
+#   strategy weight how likely a strategy is to produce a hit compared to the others
+# Word and strategy pairs trimmed for their low hit rate in earlier runs (see ProteusWordStats) are scored far below the rest
+# Since the score is a product, the domains of every strategy are sorted once, and a heap holding a single pointer per
+# (word, strategy) pair enumerates the candidates in score order. The heap stays as small as words x strategies
+class ProteusRanker:
+    def __init__(self, permutator):
+        self.permutator = permutator
+        self.config: ProteusConfig = permutator.config
+        self.permutators: set[str] = permutator.permutators
+        self.input_domains: set[str] = permutator.input_domains
+        self.baselist_rank: dict[str, int] = permutator.baselist_rank
+        self.harvest_counts: Counter = permutator.harvest_counts
+        self.strategy_weights = {"simple": 1.0, "insert": 0.6, "hyphenate": 0.4, "append-hyphenate": 0.3}
+        self.trimmed: dict[str, set[str]] = permutator.trimmed
+        self.trimmed_weight = 0.001 # trimmed words are not left out when ranking, but tried after all others
+
+    def word_scores(self) -> dict[str, float]:
+        max_count = max((self.harvest_counts[w] for w in self.permutators), default=0)
+        scores = {}
+        for word in self.permutators:
+            score = 0.01 # words without any evidence still get tried, after all others
+            rank = self.baselist_rank.get(word)
+            if rank is not None:
+                score += 1 / math.log2(rank + 2)
+            count = self.harvest_counts[word]
+            if count > 0:
+                score += math.log2(1 + count) / math.log2(1 + max_count)
+            scores[word] = score
+        return scores
+
+    # The score of a word and strategy pair, the zone score is the only part that differs per domain
+    def pair_weight(self, word: str, strategy: str, word_scores: dict[str, float]) -> float:
+        weight = word_scores[word] * self.strategy_weights[strategy]
+        if word in self.trimmed.get(strategy, ()):
+            weight *= self.trimmed_weight
+        return weight
+
+    # Amount of known domains directly below every zone
+    def zone_density(self) -> Counter:
+        density = Counter()
+        for domain in self.input_domains:
+            density[domain.partition(".")[2]] += 1
+        return density
+
+    # Domains of every strategy, sorted by zone score, along with the scores
+    def ranked_domains(self) -> dict[str, tuple[list[str], list[float]]]:
+        density = self.zone_density()
+        ranked = {}
+        for strategy in self.config.permutationStrategy:
+            scored = []
+            for domain in self.input_domains:
+                if strategy != "simple" and domain.count(".") < 2: # the other strategies skip registered domains
+                    continue
+                zone = domain if strategy == "simple" else domain.partition(".")[2]
+                scored.append((-math.log2(2 + density[zone]), domain))
+            scored.sort()
+            ranked[strategy] = ([domain for _, domain in scored], [-score for score, _ in scored])
+        return ranked
+
+    # Yields the candidates of every selected strategy best-first. Candidates of the same word, domain and strategy (the
+    # positions of insert and append-hyphenate) share a score and are yielded together
+    def candidates(self) -> Iterator[str]:
+        word_scores = self.word_scores()
+        words = sorted(self.permutators, key=lambda w: (-word_scores[w], w))
+        ranked = self.ranked_domains()
+        strategies = [s for s in ["simple", "hyphenate", "insert", "append-hyphenate"] if s in ranked and ranked[s][0]]
+
+        heap = []
+        for i, word in enumerate(words):
+            for s, strategy in enumerate(strategies):
+                score = self.pair_weight(word, strategy, word_scores) * ranked[strategy][1][0]
+                heap.append((-score, i, s, 0))
+        heapq.heapify(heap)
+
+        while heap:
+            _, i, s, j = heap[0]
+            word = words[i]
+            strategy = strategies[s]
+            domains, scores = ranked[strategy]
+            domain = domains[j]
+
+            if j + 1 < len(domains):
+                heapq.heapreplace(heap, (-self.pair_weight(word, strategy, word_scores) * scores[j + 1], i, s, j + 1))
+            else:
+                heapq.heappop(heap)
+
+            if strategy == "simple":
+                yield f"{word}.{domain}"
+            elif strategy == "hyphenate":
+                yield f"{word}-{domain}"
+            elif strategy == "insert":
+                for head, tail in self.permutator.insertion_fragments(domain):
+                    yield head + word + tail
+            else:
+                for head, tail in self.permutator.append_fragments(domain):
+                    yield head + word + tail
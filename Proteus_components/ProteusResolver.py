@@ -1,83 +1,216 @@
+import dataclasses
+import itertools
 import os
-import subprocess
 import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Optional
 
+from ProteusCache import ProteusResolutionCache
+from ProteusCheckpoint import ProteusCheckpoint
 from ProteusConfig import ProteusConfig, ErrorMessages
+from ProteusDeduplicator import ProteusDeduplicator
+from ProteusHierarchy import ProteusCandidateLevels, ProteusSuffixTrie
+from ProteusIO import is_plain_text, read_names
+from ProteusPlanner import format_duration
+from ProteusResolverBackends import resolver_backend
+from ProteusResultStore import ProteusResultStore
+from ProteusWordStats import ProteusWordStats
+
+
+LOWRAM_BYTES_PER_ENTRY = 512    # rough memory use of a single domain loaded into dnsx
+LOWRAM_MIN_ENTRIES = 10000
+LOWRAM_MAX_ENTRIES = 5000000
+CHECKPOINT_MAX_ENTRIES = 100000 # split size limit when checkpointing, a crash never costs more than one split
+
+
+# Chunk size for the low-ram split cycles, based on the available memory instead of a fixed amount of lines.
+# A quarter of the available memory is divided over the concurrent cycles. With a checkpoint the splits are also the
+# unit of progress, so they are kept small enough that resolving a single split does not take long
+def adaptive_entry_limit(config: ProteusConfig, checkpointed: bool = False) -> int:
+    available = None
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    if available is None:
+        try:
+            available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (ValueError, OSError, AttributeError):
+            pass
+
+    if available is None:
+        limit = 1000000 # 1 million
+    else:
+        limit = available // 4 // max(1, config.resolverWorkers) // LOWRAM_BYTES_PER_ENTRY
+        limit = max(LOWRAM_MIN_ENTRIES, min(LOWRAM_MAX_ENTRIES, limit))
+    if checkpointed:
+        limit = min(limit, CHECKPOINT_MAX_ENTRIES)
+    return limit
 
 
 class ProteusResolver:
-    def __init__(self, config: ProteusConfig):
+    def __init__(self, config: ProteusConfig, checkpoint: Optional[ProteusCheckpoint] = None, store: Optional[ProteusResultStore] = None,
+                 word_stats: Optional[ProteusWordStats] = None):
         self.config = config
-        self.lowram_entry_limit = 1000000   # 1 million
+        self.checkpoint = checkpoint
+        self.store = store  # if set, the answers of the resolved domains are staged in the result store
+        self.word_stats = word_stats    # if set, every queried domain is counted as an attempt of its word
+        self.backend = resolver_backend(config)
+        self.lowram_entry_limit = adaptive_entry_limit(config, checkpoint is not None)
+        self.cache = ProteusResolutionCache(config) if config.cacheFile else None
+        self.cached_resolved: list[str] = []    # names that resolved according to the cache, added to the output at the end
+
+    # The callback receiving every result of the backend, None if nothing needs the results
+    def result_handler(self):
+        handlers = [h.add for h in (self.cache, self.store, self.word_stats) if h is not None]
+        if not handlers:
+            return None
+        if len(handlers) == 1:
+            return handlers[0]
+        def on_result(result):
+            for handler in handlers:
+                handler(result)
+        return on_result
     
     def resolve(self):
         if not os.path.exists(self.config.permutatorOutput) or os.path.getsize(self.config.permutatorOutput) == 0:
             raise ValueError(ErrorMessages.RESOLVER_NO_TARGETS)
 
-        subprocess.run(
-            ["dnsx",
-             "-l", f"{self.config.permutatorOutput}",
-             "-a", "-stats",
-             "-o", f"{self.config.resolverOutput}",
-             "-t", f"{self.config.threadsResolver}",
-             "-rl", f"{self.config.rateResolver}"],
-             check=True
-        )
+        # with a cache, the generated domains are filtered before resolving, so they are streamed like in pipeline mode
+        if self.cache is not None:
+            self.resolve_stream(read_names(self.config.permutatorOutput, self.config.writeBufferSize))
+            return
+
+        self.backend.resolve_file(self.config.permutatorOutput, self.config.resolverOutput, self.result_handler())
     
-    # Low-ram version of the resolve method
+    # Pipelined version of the resolve method. Names are resolved while they are still being generated, the backend
+    # streams them into the engine (dnsx in stream mode, so it does not wait for the full list)
+    def resolve_stream(self, names: Iterable[str]):
+        if self.cache is not None:
+            names = self.cache.filter(names, self.cached_resolved)
+        self.backend.resolve_stream(names, self.config.resolverOutput, self.result_handler())
+        self.finish_cache()
+
+    # Adds the names that resolved according to the cache to the output, and applies the eviction policy
+    def finish_cache(self):
+        if self.cache is None:
+            return
+        with open(self.config.resolverOutput, "a") as f:
+            for name in self.cached_resolved:
+                f.write(name + "\n")
+        self.cached_resolved.clear()
+        self.cache.close()
+
+    # Low-ram version of the resolve method. With a checkpoint, every split and every completed cycle is recorded in the
+    # manifest, so a resumed run continues splitting from the last recorded byte offset and skips completed cycles
     def lr_resolve(self):
         if not os.path.exists(self.config.permutatorOutput) or os.path.getsize(self.config.permutatorOutput) == 0:
             raise ValueError(ErrorMessages.RESOLVER_NO_TARGETS)
 
+        # the streaming backends never hold the full list in memory and need no splitting (unless splits are needed for checkpointing)
+        if not self.backend.needs_splits and self.checkpoint is None:
+            self.resolve()
+            return
+
+        state = {}
+        if self.checkpoint is not None:
+            state = self.checkpoint.section("resolver", self.checkpoint.signature(
+                self.checkpoint.file_signature(self.config.permutatorOutput)))
+            # the split size depends on the memory available at the start, so a resumed run keeps the size it started with
+            self.lowram_entry_limit = state.setdefault("entry_limit", self.lowram_entry_limit)
+            if state.get("done") and os.path.exists(self.config.resolverOutput):
+                if not self.config.silent:
+                    print("resolving was already completed, skipping")
+                self.finish_cache()
+                return
+        completed = state.setdefault("cycles", [])
+
         if not self.config.silent:
             print(f"splitting the file of generated domains into files of {self.lowram_entry_limit} lines")
 
-        with open(self.config.permutatorOutput, "r") as f:
-            file_count = 0
-            buffer = []
+        file_count = state.get("splits", 0)
+        buffer = []
+        if is_plain_text(self.config.permutatorOutput):
+            # read as bytes, so the offset of every split in the generated domains file is known
+            with open(self.config.permutatorOutput, "rb") as f:
+                offset = state.get("offset", 0)
+                f.seek(offset)
 
-            for line in f:
-                buffer.append(line)
+                for line in f:
+                    offset += len(line)
+                    if line.strip():
+                        buffer.append(line.rstrip(b"\r\n") + b"\n")
 
+                    if len(buffer) >= self.lowram_entry_limit:
+                        file_count += 1
+                        self._write_split(file_count, buffer, offset, state)
+                        buffer.clear()
+        else:
+            # compressed and binary files can not be seeked into, so the offset is the amount of names already split
+            offset = state.get("offset", 0)
+            for name in itertools.islice(read_names(self.config.permutatorOutput, self.config.writeBufferSize), offset, None):
+                offset += 1
+                buffer.append(name.encode() + b"\n")
                 if len(buffer) >= self.lowram_entry_limit:
                     file_count += 1
-                    with open(f"lowram_resolver_split_{file_count}.txt", "w") as out:
-                        out.writelines(buffer)
-                    
+                    self._write_split(file_count, buffer, offset, state)
                     buffer.clear()
-            
-            if buffer:
-                file_count += 1
-                with open(f"lowram_resolver_split_{file_count}.txt", "w") as out:
-                        out.writelines(buffer)
+
+        if buffer:
+            file_count += 1
+            self._write_split(file_count, buffer, offset, state)
 
         if not self.config.silent:
             print(f"splitting succeeded, generated {file_count} file(s)")
 
+        todo = []
         for i in range(file_count):
-            if not self.config.silent:
-                print(f"starting resolver cycle {i + 1} of {file_count}")
-
-            subprocess.run(
-                ["dnsx",
-                "-l", f"lowram_resolver_split_{i + 1}.txt",
-                "-a", "-stats",
-                "-o", f"lowram_resolver_output_{i + 1}.txt",
-                "-t", f"{self.config.threadsResolver}",
-                "-rl", f"{self.config.rateResolver}"],
-                check=True)
+            if i + 1 in completed:
+                if not self.config.silent:
+                    print(f"skipping resolver cycle {i + 1} of {file_count}, it was completed earlier")
+            else:
+                todo.append(i + 1)
+
+        # concurrent cycles share the global rate and thread budget
+        workers = max(1, min(self.config.resolverWorkers, len(todo)))
+        chunk_config = self.config
+        if workers > 1:
+            chunk_config = dataclasses.replace(self.config,
+                rateResolver=max(1, self.config.rateResolver // workers) if self.config.rateResolver > 0 else self.config.rateResolver,
+                threadsResolver=max(1, self.config.threadsResolver // workers),
+                minRateResolver=max(1, self.config.minRateResolver // workers),
+                maxRateResolver=max(1, self.config.maxRateResolver // workers))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            running = {}
+            for number in todo:
+                if len(running) >= workers:
+                    self._complete_cycles(running, completed, wait(running, return_when=FIRST_COMPLETED).done)
+                if not self.config.silent:
+                    print(f"starting resolver cycle {number} of {file_count}")
+                future = executor.submit(self._resolve_chunk, f"lowram_resolver_split_{number}.txt", f"lowram_resolver_output_{number}.txt", chunk_config)
+                running[future] = number
+            self._complete_cycles(running, completed, wait(running).done)
         
         if not self.config.silent:
             print("completed all resolver cycles, merging the files")
 
-        output = set()
-        for j in range(file_count):
-            with open(f"lowram_resolver_output_{j + 1}.txt", "r") as f:
-                for line in f:
-                    output.add(line)
-        
-        with open(f"{self.config.resolverOutput}", "w") as f:
-            f.writelines(output)
+        # streaming external merge, memory stays within the memory budget however large the outputs are
+        def merged_outputs():
+            for j in range(file_count):
+                with open(f"lowram_resolver_output_{j + 1}.txt", "r") as f:
+                    for line in f:
+                        if line.strip():
+                            yield line.strip()
+
+        with open(f"{self.config.resolverOutput}", "w", buffering=self.config.writeBufferSize) as f:
+            for name in ProteusDeduplicator(self.config, backend="sort").dedup(merged_outputs()): # results are always deduplicated exactly
+                f.write(name + "\n")
+        self.finish_cache()
         
         if not self.config.silent:
             print("finsihed merging the files, cleaning up extra files")
@@ -86,11 +219,117 @@ class ProteusResolver:
             os.remove(f"lowram_resolver_split_{x + 1}.txt")
             os.remove(f"lowram_resolver_output_{x + 1}.txt")
 
+        if self.checkpoint is not None:
+            state["done"] = True
+            self.checkpoint.save()
+
         if not self.config.silent:
             print("cleanup completed")
 
+    def _complete_cycles(self, running: dict, completed: list[int], done: set):
+        for future in done:
+            number = running.pop(future)
+            future.result() # raises the error of a failed cycle
+            if self.checkpoint is not None:
+                completed.append(number)
+                self.checkpoint.save()
 
-    def print_resolve_time(self):
+    def _write_split(self, number: int, lines: list[bytes], offset: int, state: dict):
+        with open(f"lowram_resolver_split_{number}.txt", "wb") as out:
+            out.writelines(lines)
+        if self.checkpoint is not None:
+            state["splits"] = number
+            state["offset"] = offset
+            self.checkpoint.save()
+
+    # Resolves a single split file into its own output file. Names are filtered against the cache first, and the names
+    # that resolved according to the cache are added to the output of the split, so they survive a resumed run
+    # Runs in a worker thread when cycles run concurrently, the cache serializes its own access
+    def _resolve_chunk(self, split_file: str, output_file: str, config: ProteusConfig):
+        backend = resolver_backend(config)
+        if self.cache is None:
+            backend.resolve_file(split_file, output_file, self.result_handler())
+            return
+
+        cached_resolved = []
+        with open(split_file, "r") as f:
+            backend.resolve_stream(self.cache.filter((line.strip() for line in f if line.strip()), cached_resolved), output_file, self.result_handler())
+        self.cache.flush()
+        with open(output_file, "a") as f:
+            for name in cached_resolved:
+                f.write(name + "\n")
+
+    # Hierarchical version of the resolve method. The generated domains are split by level (see ProteusCandidateLevels) and
+    # resolved level by level, shallowest first. Every NXDOMAIN answer is stored in a suffix trie, and deeper candidates below
+    # a name that does not exist are skipped. The level 1 parents of the deeper candidates are resolved along with level 1,
+    # even when they were not generated, if they can rule out more than one candidate. Those that resolve are results as well
+    def hierarchical_resolve(self, known_domains: Iterable[str]):
+        if not os.path.exists(self.config.permutatorOutput) or os.path.getsize(self.config.permutatorOutput) == 0:
+            raise ValueError(ErrorMessages.RESOLVER_NO_TARGETS)
+
+        levels = ProteusCandidateLevels(known_domains)
+        level_files = {}
+        # every deeper candidate is paired with its level 1 parent, and the pairs are sorted by the external sort of the
+        # deduplicator, so the candidates below a parent are counted in a single pass with memory bounded by the memory budget
+        def pivot_pairs():
+            for name in read_names(self.config.permutatorOutput, self.config.writeBufferSize):
+                level = levels.level(name)
+                if level not in level_files:
+                    level_files[level] = open(f"proteus_hierarchy_level_{level}.txt", "w", buffering=self.config.writeBufferSize)
+                level_files[level].write(name + "\n")
+                if level > 1:
+                    yield levels.pivot(name, level) + "\t" + name
+        try:
+            pairs = ProteusDeduplicator(self.config, backend="sort").dedup(pivot_pairs())
+            for pivot, group in itertools.groupby(pairs, key=lambda pair: pair.partition("\t")[0]):
+                next(group)
+                if next(group, None) is None: # a query that can only rule out a single candidate saves nothing
+                    continue
+                if 1 not in level_files:
+                    level_files[1] = open("proteus_hierarchy_level_1.txt", "w", buffering=self.config.writeBufferSize)
+                level_files[1].write(pivot + "\n")
+        finally:
+            for f in level_files.values():
+                f.close()
+
+        trie = ProteusSuffixTrie()
+        handler = self.result_handler()
+        def on_result(result):
+            trie.add_result(result)
+            if handler is not None:
+                handler(result)
+
+        skipped = 0
+        def unpruned(names):
+            nonlocal skipped
+            for name in names:
+                if trie.covers(name):
+                    skipped += 1
+                else:
+                    yield name
+
+        with open(self.config.resolverOutput, "w", buffering=self.config.writeBufferSize) as out:
+            for level in sorted(level_files):
+                level_file = f"proteus_hierarchy_level_{level}.txt"
+                with open(level_file, "r", buffering=self.config.writeBufferSize) as f:
+                    names = unpruned(ProteusDeduplicator(self.config, backend="sort").dedup(line.rstrip("\n") for line in f))
+                    if self.cache is not None:
+                        names = self.cache.filter(names, self.cached_resolved)
+                    self.backend.resolve_stream(names, f"{level_file}.resolved", on_result)
+                with open(f"{level_file}.resolved", "r") as f:
+                    for line in f:
+                        out.write(line)
+                os.remove(level_file)
+                os.remove(f"{level_file}.resolved")
+                if not self.config.silent:
+                    print(f"resolved level {level} of {max(level_files)}, {trie.count} name(s) found not to exist so far")
+
+        self.finish_cache()
+        if not self.config.silent:
+            print(f"hierarchical resolving skipped {skipped} candidate(s) below names that do not exist")
+
+    # Uses the amount of generated domains counted by the permutator if known, otherwise the newlines in the file are counted in large binary chunks
+    def print_resolve_time(self, lines: Optional[int] = None):
         if not os.path.exists(self.config.permutatorOutput):
             raise FileNotFoundError(ErrorMessages.GENERATED_FILE_DOES_NOT_EXIST.format(self.config.permutatorOutput))
         
@@ -98,26 +337,15 @@ class ProteusResolver:
             print("unable to do a time estimate, as the rate is unlimited")
             return
         
-        with open(self.config.permutatorOutput, "r") as f:
-            lines = sum(1 for _ in f)
+        if lines is None and is_plain_text(self.config.permutatorOutput):
+            lines = 0
+            with open(self.config.permutatorOutput, "rb") as f:
+                while chunk := f.read(self.config.writeBufferSize):
+                    lines += chunk.count(b"\n")
+        elif lines is None:
+            lines = sum(1 for _ in read_names(self.config.permutatorOutput, self.config.writeBufferSize))
         
         resolve_time_minimum =  math.ceil(lines / self.config.rateResolver)
-        
-        resolve_hours = resolve_time_minimum // 3600
-        resolve_remaining = resolve_time_minimum % 3600
-        resolve_minutes = resolve_remaining // 60
-        resolve_seconds = resolve_remaining % 60
-
-        resolve_estimate = ""
-        if resolve_hours > 0:
-            resolve_estimate += f"hours: {resolve_hours}"
-        if resolve_minutes > 0:
-            if resolve_estimate != "":
-                resolve_estimate += ", "
-            resolve_estimate += f"minutes: {resolve_minutes}"
-        if resolve_seconds > 0:
-            if resolve_estimate != "":
-                resolve_estimate += ", "
-            resolve_estimate += f"seconds: {resolve_seconds}"
+        resolve_estimate = format_duration(resolve_time_minimum)
 
         print(f"Estimated time to attempt resolving all generated domains ({lines}) is: {resolve_estimate}. This estimate is assuming that the resolver runs at the maximum set rate of {self.config.rateResolver} the whole time, which may not be true if dnsx is bottlenecked by assigned threads, bandwith, or rate-limiting")
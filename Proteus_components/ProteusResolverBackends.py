@@ -0,0 +1,200 @@
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from ProteusAsyncResolver import ProteusAsyncResolver, ProteusDNSResult
+from ProteusConfig import ProteusConfig
+from ProteusIO import is_plain_text, read_names
+
+
+# Resolver backends. Whichever engine runs the queries, a backend writes the names that resolved (with at least one A record)
+# to the output file, one per line, and hands a normalized ProteusDNSResult of every queried name to on_result (if set).
+# The merging, deduplication and caching code only relies on these two, so it works the same for every backend
+class ProteusResolverBackend:
+    name = None
+    needs_splits = False    # the engine loads its whole input into memory, so low-ram mode splits the input for it
+
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+
+    # Resolves every name in the input file (in any of the formats of ProteusIO)
+    def resolve_file(self, input_path: str, output_path: str, on_result: Optional[Callable[[ProteusDNSResult], None]] = None):
+        self.resolve_stream(read_names(input_path, self.config.writeBufferSize), output_path, on_result)
+
+    # Resolves a stream of names, for example straight from the permutator
+    def resolve_stream(self, names: Iterable[str], output_path: str, on_result: Optional[Callable[[ProteusDNSResult], None]] = None):
+        raise NotImplementedError
+
+
+class ProteusNativeBackend(ProteusResolverBackend):
+    name = "native"
+
+    def resolve_stream(self, names, output_path, on_result=None):
+        ProteusAsyncResolver(self.config).resolve_to_file(names, output_path, on_result)
+
+
+# Backends running an external binary. The names are fed to its stdin from a separate thread, while its stdout is parsed
+# line by line into results. The engines only report the names they got an answer for, so every queried name without an
+# answer is reported as UNRESOLVED once the process finished (which needs the queried names, kept in a file next to the output)
+class ProteusProcessBackend(ProteusResolverBackend):
+    # Command line of the engine, reading input_path, or stdin if it is None
+    def command(self, input_path: Optional[str], output_path: str) -> list[str]:
+        raise NotImplementedError
+
+    # Parses a line of output into a result, None for lines that are not a result
+    def parse(self, line: str) -> Optional[ProteusDNSResult]:
+        raise NotImplementedError
+
+    def resolve_stream(self, names, output_path, on_result=None):
+        self._run(self.command(None, output_path), names, output_path + ".queried", output_path, on_result)
+
+    # Runs the engine on the names, or on its input file if names is None. The queried names are read back from queried_path
+    def _run(self, args: list[str], names: Optional[Iterable[str]], queried_path: str, output_path: str, on_result: Optional[Callable[[ProteusDNSResult], None]]):
+        start = time.monotonic()
+        process = subprocess.Popen(args, stdin=subprocess.PIPE if names is not None else subprocess.DEVNULL, stdout=subprocess.PIPE, text=True, bufsize=1)
+
+        errors = []
+        def feed():
+            queried = open(queried_path, "w", buffering=self.config.writeBufferSize) if on_result is not None else None
+            try:
+                batch = []
+                for name in names:
+                    batch.append(name)
+                    if len(batch) >= 4096:
+                        process.stdin.write("\n".join(batch) + "\n")
+                        if queried is not None:
+                            queried.write("\n".join(batch) + "\n")
+                        batch.clear()
+                if batch:
+                    process.stdin.write("\n".join(batch) + "\n")
+                    if queried is not None:
+                        queried.write("\n".join(batch) + "\n")
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                if queried is not None:
+                    queried.close()
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        feeder = None
+        if names is not None:
+            feeder = threading.Thread(target=feed, daemon=True)
+            feeder.start()
+
+        answered = set()    # names with an answer, only kept to report the others as unresolved
+        resolved = 0
+        try:
+            with open(output_path, "w", buffering=self.config.writeBufferSize) as out:
+                for line in process.stdout:
+                    result = self.parse(line)
+                    if result is None:
+                        continue
+                    if result.resolved:
+                        out.write(result.name + "\n")
+                        resolved += 1
+                    if on_result is not None:
+                        answered.add(result.name)
+                        on_result(result)
+        finally:
+            process.stdout.close()
+            process.wait()
+            if feeder is not None:
+                feeder.join()
+        if process.returncode != 0: # checked first, as an engine that failed also breaks the pipe of the feeder
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+        if errors:
+            raise errors[0]
+
+        if on_result is not None:
+            with open(queried_path, "r") as f:
+                for line in f:
+                    name = line.strip()
+                    if name and name not in answered:
+                        on_result(ProteusDNSResult(name, "UNRESOLVED"))
+            if names is not None:
+                os.remove(queried_path)
+
+        if not self.config.silent:
+            print(f"{self.name} resolved {resolved} domains in {time.monotonic() - start:.1f}s")
+
+
+# dnsx (ProjectDiscovery). Reads a plain text input file itself, which shows its progress stats, anything else is streamed in.
+# Loads its whole input into memory
+class ProteusDnsxBackend(ProteusProcessBackend):
+    name = "dnsx"
+    needs_splits = True
+
+    def command(self, input_path, output_path):
+        args = ["dnsx", "-a", "-json", "-silent",
+                "-t", f"{self.config.threadsResolver}",
+                "-rl", f"{self.config.rateResolver}"]
+        if input_path is None:
+            return args + ["-stream"]
+        return args + ["-l", input_path, "-stats"]
+
+    def resolve_file(self, input_path, output_path, on_result=None):
+        if not is_plain_text(input_path):
+            super().resolve_file(input_path, output_path, on_result)
+            return
+        self._run(self.command(input_path, output_path), None, input_path, output_path, on_result)
+
+    def parse(self, line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if "host" not in record:
+            return None
+        return ProteusDNSResult(record["host"].strip(".").lower(), record.get("status_code", "NOERROR"), record.get("a", []), record.get("cname", []))
+
+
+# massdns. Keeps a fixed amount of lookups in flight (the thread count) instead of a rate limit, so it has no rate limit
+# and it streams its input. Queries the resolver pool, and retries like the native resolver
+class ProteusMassdnsBackend(ProteusProcessBackend):
+    name = "massdns"
+
+    def command(self, input_path, output_path):
+        return ["massdns", "-q",
+                "-r", output_path + ".resolvers",
+                "-t", "A",
+                "-o", "J",
+                "-s", f"{self.config.threadsResolver}",
+                "-c", f"{self.config.resolverRetries + 1}"]
+
+    # massdns reads the resolver pool from a file, written next to the output so concurrent cycles do not share it
+    def resolve_stream(self, names, output_path, on_result=None):
+        with open(output_path + ".resolvers", "w") as f:
+            f.write("\n".join(self.config.resolvers) + "\n")
+        try:
+            super().resolve_stream(names, output_path, on_result)
+        finally:
+            os.remove(output_path + ".resolvers")
+
+    def parse(self, line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if "name" not in record:
+            return None
+        a_records = []
+        cnames = []
+        for answer in record.get("data", {}).get("answers", []):
+            if answer.get("type") == "A":
+                a_records.append(answer["data"])
+            elif answer.get("type") == "CNAME":
+                cnames.append(answer["data"].strip(".").lower())
+        return ProteusDNSResult(record["name"].strip(".").lower(), record.get("status", "TIMEOUT"), a_records, cnames)
+
+
+BACKENDS = {backend.name: backend for backend in [ProteusDnsxBackend, ProteusMassdnsBackend, ProteusNativeBackend]}
+
+
+def resolver_backend(config: ProteusConfig) -> ProteusResolverBackend:
+    return BACKENDS[config.resolverBackend](config)
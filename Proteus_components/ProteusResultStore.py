@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Iterable, Optional
+
+from ProteusAsyncResolver import ProteusDNSResult
+from ProteusConfig import ProteusConfig
+
+
+# Indexed result store (SQLite in WAL mode) shared across runs. Every resolved domain is kept once, with the run that found it
+# first and last, the word, strategy and input domain that generated it, and its A and CNAME records in an indexed table, so
+# lookups like "every hit behind this CNAME" or "the words that hit" stay fast on millions of rows.
+# While resolving, the answers are staged in a temporary table. Once the run is complete (after wildcard filtering and every
+# round), the final resolved domains are upserted with their staged answers, so the store holds exactly the run's results
+class ProteusResultStore:
+    def __init__(self, path: str, config: Optional[ProteusConfig] = None):
+        self.config = config
+        self.batch_size = 10000
+        self.pending: list[tuple] = []
+        self.run_id = uuid.uuid4().hex[:16]
+        self.started_at = int(time.time())
+
+        self.lock = threading.RLock()    # concurrent low-ram cycles share the store
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                fqdn TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                word TEXT,
+                strategy TEXT,
+                source TEXT,
+                first_run TEXT NOT NULL,
+                last_run TEXT NOT NULL,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS results_word ON results (word);
+            CREATE INDEX IF NOT EXISTS results_strategy ON results (strategy);
+            CREATE INDEX IF NOT EXISTS results_last_run ON results (last_run);
+            CREATE TABLE IF NOT EXISTS records (
+                fqdn TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (fqdn, type, value)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS records_value ON records (type, value);
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                started_at INTEGER NOT NULL,
+                finished_at INTEGER,
+                inputs TEXT,
+                strategies TEXT,
+                hits INTEGER
+            );
+            CREATE TEMP TABLE IF NOT EXISTS staged (
+                fqdn TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                a TEXT NOT NULL,
+                cname TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        if config is not None:
+            self.db.execute("INSERT INTO runs (run_id, started_at, inputs, strategies) VALUES (?, ?, ?, ?)",
+                            (self.run_id, self.started_at, json.dumps(config.inputFiles or [config.file]), json.dumps(config.permutationStrategy)))
+        self.db.commit()
+
+    # Stages the answers of a resolved domain, can be used as the on_result of a resolver backend
+    def add(self, result: ProteusDNSResult):
+        if not result.resolved:
+            return
+        with self.lock:
+            self.pending.append((result.name, result.status, ",".join(result.a), ",".join(result.cname)))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            self.db.executemany("INSERT OR REPLACE INTO staged (fqdn, status, a, cname) VALUES (?, ?, ?, ?)", self.pending)
+            self.pending.clear()
+
+    # Upserts the final resolved domains of the run. explain gives the (word, strategy, input domain) that generated a domain.
+    # Domains that are already stored keep their first run and provenance, and gain the records of this run
+    def commit_run(self, names: Iterable[str], explain: Callable[[str], Optional[tuple[str, str, str]]]) -> int:
+        self.flush()
+        now = int(time.time())
+        hits = 0
+        batch = []
+
+        def write(batch):
+            placeholders = ",".join("?" * len(batch))
+            staged = {row[0]: row[1:] for row in self.db.execute(f"SELECT fqdn, status, a, cname FROM staged WHERE fqdn IN ({placeholders})", batch)}
+            rows = []
+            records = []
+            for name in batch:
+                status, a, cname = staged.get(name, ("NOERROR", "", "")) # names answered by the resolution cache have no staged answers
+                word, strategy, source = explain(name) or (None, None, None)
+                rows.append((name, status, word, strategy, source, self.run_id, self.run_id, now, now))
+                records.extend((name, "A", value) for value in a.split(",") if value)
+                records.extend((name, "CNAME", value) for value in cname.split(",") if value)
+            self.db.executemany("""INSERT INTO results (fqdn, status, word, strategy, source, first_run, last_run, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (fqdn) DO UPDATE SET
+                    status = excluded.status,
+                    word = COALESCE(results.word, excluded.word),
+                    strategy = COALESCE(results.strategy, excluded.strategy),
+                    source = COALESCE(results.source, excluded.source),
+                    last_run = excluded.last_run,
+                    last_seen = excluded.last_seen""", rows)
+            self.db.executemany("INSERT OR IGNORE INTO records (fqdn, type, value) VALUES (?, ?, ?)", records)
+
+        with self.lock:
+            for name in names:
+                batch.append(name)
+                if len(batch) >= 900: # older SQLite versions allow 999 variables per statement
+                    write(batch)
+                    hits += len(batch)
+                    batch = []
+            if batch:
+                write(batch)
+                hits += len(batch)
+            self.db.execute("UPDATE runs SET finished_at = ?, hits = ? WHERE run_id = ?", (now, hits, self.run_id))
+            self.db.execute("DELETE FROM staged")
+            self.db.commit()
+        return hits
+
+    def behind_cname(self, target: str) -> list[str]:
+        return [row[0] for row in self.db.execute("SELECT fqdn FROM records WHERE type = 'CNAME' AND value = ? ORDER BY fqdn", (target.strip(".").lower(),))]
+
+    def behind_ip(self, address: str) -> list[str]:
+        return [row[0] for row in self.db.execute("SELECT fqdn FROM records WHERE type = 'A' AND value = ? ORDER BY fqdn", (address,))]
+
+    def word_hits(self, limit: int = 50) -> list[tuple[str, int]]:
+        return self.db.execute("SELECT word, COUNT(*) AS hits FROM results WHERE word IS NOT NULL GROUP BY word ORDER BY hits DESC, word LIMIT ?", (limit,)).fetchall()
+
+    def strategy_hits(self) -> list[tuple[str, int]]:
+        return self.db.execute("SELECT strategy, COUNT(*) AS hits FROM results WHERE strategy IS NOT NULL GROUP BY strategy ORDER BY hits DESC").fetchall()
+
+    def explain(self, fqdn: str) -> Optional[dict]:
+        row = self.db.execute("SELECT fqdn, status, word, strategy, source, first_run, last_run, first_seen, last_seen FROM results WHERE fqdn = ?", (fqdn.strip(".").lower(),)).fetchone()
+        if row is None:
+            return None
+        result = dict(zip(["fqdn", "status", "word", "strategy", "source", "first_run", "last_run", "first_seen", "last_seen"], row))
+        for record_type, value in self.db.execute("SELECT type, value FROM records WHERE fqdn = ? ORDER BY type, value", (result["fqdn"],)):
+            result.setdefault(record_type.lower(), []).append(value)
+        return result
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.db.commit()
+            self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the result store of Proteus runs (--results-db)")
+    parser.add_argument("store", type=str, help="the result store file")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--cname", type=str, help="list the domains with a CNAME to this target")
+    group.add_argument("--ip", type=str, help="list the domains with an A record of this address")
+    group.add_argument("--words", action="store_true", help="list the words that generated the most hits")
+    group.add_argument("--strategies", action="store_true", help="list the hits per strategy")
+    group.add_argument("--explain", type=str, help="show everything stored about a domain")
+    parser.add_argument("--limit", type=int, default=50, help="set the amount of words listed [DEFAULT: 50]")
+    args = parser.parse_args()
+
+    store = ProteusResultStore(args.store)
+    try:
+        if args.cname is not None:
+            print("\n".join(store.behind_cname(args.cname)))
+        elif args.ip is not None:
+            print("\n".join(store.behind_ip(args.ip)))
+        elif args.words:
+            for word, hits in store.word_hits(args.limit):
+                print(f"{word} : {hits}")
+        elif args.strategies:
+            for strategy, hits in store.strategy_hits():
+                print(f"{strategy} : {hits}")
+        else:
+            print(json.dumps(store.explain(args.explain), indent=2))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import dataclasses
+import heapq
+import itertools
+import os
+from typing import Iterable, Iterator, Optional
+
+from ProteusConfig import ProteusConfig
+from ProteusDeduplicator import ProteusDeduplicator
+from ProteusIngest import DOMAIN_BYTES
+from ProteusIO import read_names, tag_path
+from ProteusMetrics import ProteusMetrics, count_lines
+from ProteusPermutator import ProteusPermutator
+from ProteusResolver import ProteusResolver
+from ProteusResultStore import ProteusResultStore
+from ProteusWildcard import ProteusWildcardDetector
+from ProteusWordStats import ProteusWordStats
+
+
+# Yields the items of the sorted items that are not in the sorted excluded items
+def sorted_difference(items: Iterable[str], excluded: Iterable[str]) -> Iterator[str]:
+    excluded = iter(excluded)
+    current = next(excluded, None)
+    for item in items:
+        while current is not None and current < item:
+            current = next(excluded, None)
+        if item != current:
+            yield item
+
+
+# Feedback rounds. Every round after the first takes the domains that resolved in the previous round and were not known yet,
+# and only generates the delta: the new domains with all words, and the known domains with the words newly harvested from
+# the new domains. Every name generated in an earlier round is skipped, so no name is ever queried twice, and the work per
+# round shrinks with the amount of new domains. The names generated so far are kept in a sorted file, not in memory
+class ProteusRounds:
+    def __init__(self, config: ProteusConfig, permutator: ProteusPermutator, metrics: ProteusMetrics, wildcard_detector: Optional[ProteusWildcardDetector] = None, store: Optional[ProteusResultStore] = None,
+                 word_stats: Optional[ProteusWordStats] = None):
+        self.config = config
+        self.permutator = permutator
+        self.metrics = metrics
+        self.wildcard_detector = wildcard_detector
+        self.store = store
+        self.word_stats = word_stats
+        self.tried_file = "proteus_rounds_tried.txt"    # every name generated so far, sorted
+
+    @staticmethod
+    def round_path(path: str, number: int) -> str:
+        return tag_path(path, f"round{number}")
+
+    def run(self):
+        self.metrics.expected.clear() # the expected counts of the first round do not apply to the delta rounds
+
+        # the names generated by the first round are the start of the tried names
+        with self.metrics.stage("rounds_tried"):
+            self._write_sorted(self.tried_file, read_names(self.config.permutatorOutput, self.config.writeBufferSize))
+        previous_output = self.config.resolverOutput
+
+        try:
+            for number in range(2, self.config.rounds + 1):
+                new_domains = list(dict.fromkeys(name for name in self._read_names(previous_output) if name not in self.permutator.input_domains))
+                if not new_domains:
+                    if not self.config.silent:
+                        print(f"no new domains resolved, stopping after round {number - 1}")
+                    break
+                previous_output = self.run_round(number, new_domains)
+        finally:
+            if os.path.exists(self.tried_file):
+                os.remove(self.tried_file)
+
+    # Returns the path of the resolved domains of the round
+    def run_round(self, number: int, new_domains: list[str]) -> str:
+        new_words = self.harvest_new_words(new_domains)
+        if not self.config.silent:
+            print(f"starting round {number} of {self.config.rounds}: {len(new_domains)} new domain(s), {len(new_words)} new word(s)")
+
+        round_config = dataclasses.replace(self.config,
+            permutatorOutput=self.round_path(self.config.permutatorOutput, number),
+            resolverOutput=self.round_path(self.config.resolverOutput, number))
+
+        if self.wildcard_detector is not None:
+            self.wildcard_detector.detect(self.wildcard_detector.parent_zones(new_domains))
+
+        # the delta: new domains with all words (including the new ones), then the known domains with the new words
+        known_domains = list(self.permutator.input_domains)
+        self.permutator.input_domains.update(new_domains)
+        self.permutator.permutators.update(new_words)
+        candidates = itertools.chain(self.permutator.permutate(new_domains), self.permutator.permutate(known_domains, new_words))
+
+        with self.metrics.stage(f"round {number} permutate", len(new_domains)) as stage:
+            deduplicator = ProteusDeduplicator(self.config, backend="sort") # sorted, so it can be compared against the tried names
+            with open(self.tried_file, "r", buffering=self.config.writeBufferSize) as tried:
+                delta = sorted_difference(deduplicator.dedup(candidates), (line.rstrip("\n") for line in tried))
+                stage.items_out = self.permutator._write_batched(round_config.permutatorOutput, delta)
+
+        if stage.items_out == 0:
+            if not self.config.silent:
+                print(f"round {number} generated no new names")
+            open(round_config.resolverOutput, "w").close()
+            return round_config.resolverOutput
+
+        # the round is added to the tried names before resolving, so a failed round is not retried by a later one either
+        # the names of the round are not in the tried names yet, and the round file is read in the format of the permutator output
+        merged = self.tried_file + ".tmp"
+        with open(self.tried_file, "r", buffering=self.config.writeBufferSize) as tried:
+            names = heapq.merge((line.rstrip("\n") for line in tried), read_names(round_config.permutatorOutput, self.config.writeBufferSize))
+            self._write_sorted(merged, names, presorted=True)
+        os.replace(merged, self.tried_file)
+
+        resolver = ProteusResolver(round_config, store=self.store, word_stats=self.word_stats)
+        with self.metrics.stage(f"round {number} resolve", stage.items_out) as resolve_stage:
+            if self.config.hierarchical:
+                resolver.hierarchical_resolve(self.permutator.input_domains)
+            elif self.config.lowRamMode:
+                resolver.lr_resolve()
+            else:
+                resolver.resolve()
+            if self.wildcard_detector is not None:
+                self.wildcard_detector.filter_results(round_config.resolverOutput)
+            resolve_stage.items_out = count_lines(round_config.resolverOutput)
+
+        # the names of the round were never generated before, so they are new to the combined output as well
+        with open(self.config.resolverOutput, "a") as out, open(round_config.resolverOutput, "r") as f:
+            for line in f:
+                if line.strip():
+                    out.write(line.strip() + "\n")
+
+        if not self.config.silent:
+            print(f"round {number} resolved {resolve_stage.items_out} of {stage.items_out} new name(s)")
+        return round_config.resolverOutput
+
+    # Adds the labels of the new domains to the harvest counts, and returns the words that made it into the top harvested
+    # words (the same selection as the first round) but are not used yet
+    def harvest_new_words(self, new_domains: list[str]) -> list[str]:
+        if not self.config.harvest:
+            return []
+        counts = self.permutator.harvest_counts
+        for domain in new_domains:
+            for label in domain.split("."):
+                if label:
+                    counts[label] += 1
+        return [word for word, _ in counts.most_common(self.config.maxHarvestedWords) if word not in self.permutator.permutators]
+
+    def _read_names(self, path: str) -> Iterator[str]:
+        with open(path, "rb") as f:
+            for line in f:
+                line = line.strip().lower()
+                if line and not line.translate(None, DOMAIN_BYTES):
+                    yield line.decode("ascii")
+
+    def _write_sorted(self, path: str, names: Iterable[str], presorted: bool = False):
+        if not presorted:
+            names = ProteusDeduplicator(self.config, backend="sort").dedup(names)
+        self.permutator._write_batched(path, names)
+
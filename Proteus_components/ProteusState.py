@@ -0,0 +1,28 @@
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+
+
+# Snapshot of what a run permutated: the input domains, the effective permutator words and the strategies. A later run
+# with the same state file only generates what is new compared to the snapshot (see ProteusPermutator.permutate_delta)
+@dataclass
+class ProteusRunState:
+    domains: set = field(default_factory=set)
+    words: set = field(default_factory=set)
+    strategies: list = field(default_factory=list)
+    version: int = 1
+
+    # The snapshot is gzipped JSON with sorted lists, which compresses well as sorted domains share long prefixes
+    @classmethod
+    def load(cls, path: str) -> "ProteusRunState":
+        with gzip.open(path, "rt") as f:
+            data = json.load(f)
+        return cls(set(data["domains"]), set(data["words"]), data["strategies"], data["version"])
+
+    # The snapshot is replaced atomically, so a crash while saving leaves the previous snapshot intact
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", compresslevel=6) as f:
+            json.dump({"version": self.version, "strategies": self.strategies, "words": sorted(self.words), "domains": sorted(self.domains)}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+import argparse
+import multiprocessing
+import socket
+import struct
+import time
+import zlib
+
+from ProteusAsyncResolver import encode_name, read_name
+
+
+# Minimal local DNS server answering A queries, used to benchmark and try out the resolvers without sending traffic to real
+# resolvers. A fixed share of the names resolves (chosen by hash, so the same name always gets the same answer), names
+# below wildcard zones always resolve, and an optional throttle simulates a rate limiting resolver. With existing domains
+# set, the answers follow RFC 8020: the existing domains and their parents exist, and any other name only exists if it is
+# chosen by hash and its parent exists, so there is nothing below a name that does not exist. Names set as CNAMEs are
+# answered with the CNAME record, followed by the A record of the target if the target resolves
+class ProteusStubDNS:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, hit_ratio: float = 0.1, wildcard_zones: tuple = (),
+                 throttle_rate: float = 0, throttle_mode: str = "refuse", existing_domains: tuple = (), cnames: dict = None):
+        self.hit_ratio = hit_ratio
+        self.cnames = {name.strip(".").lower(): target.strip(".").lower() for name, target in (cnames or {}).items()}
+        self.wildcard_zones = tuple("." + z.strip(".") for z in wildcard_zones)
+        self.existing = set()
+        for domain in existing_domains:
+            parts = domain.strip(".").lower().split(".")
+            self.existing.update(".".join(parts[i:]) for i in range(len(parts)))
+        self.throttle_rate = throttle_rate      # queries per second answered normally, anything at or below 0 is unlimited
+        self.throttle_mode = throttle_mode      # what happens above the throttle rate: refuse, servfail or drop
+        self.process = None
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sock.bind((host, port))
+        self.address = self.sock.getsockname()
+
+    def answer(self, name: str):
+        for zone in self.wildcard_zones:
+            if name.endswith(zone):
+                return bytes([10, 255, 255, 1])
+        digest = zlib.crc32(name.encode())
+        if self.existing and not self.exists(name):
+            return None
+        if name in self.existing or digest % 10000 < self.hit_ratio * 10000:
+            return bytes([10, (digest >> 16) & 0xFF, (digest >> 8) & 0xFF, digest & 0xFF])
+        return None
+
+    def exists(self, name: str) -> bool:
+        while name not in self.existing:
+            if "." not in name or zlib.crc32(name.encode()) % 10000 >= self.hit_ratio * 10000:
+                return False
+            name = name.split(".", 1)[1]
+        return True
+
+    def serve_forever(self):
+        tokens = max(1.0, self.throttle_rate)
+        updated = time.monotonic()
+        while True:
+            data, addr = self.sock.recvfrom(512)
+            if len(data) < 17:
+                continue
+            try:
+                name, end = read_name(data, 12)
+            except (IndexError, ValueError):
+                continue
+            question = data[12:end + 4]
+
+            if self.throttle_rate > 0:
+                now = time.monotonic()
+                tokens = min(self.throttle_rate, tokens + (now - updated) * self.throttle_rate)
+                updated = now
+                if tokens < 1:
+                    if self.throttle_mode == "drop":
+                        continue
+                    rcode = 5 if self.throttle_mode == "refuse" else 2
+                    self.sock.sendto(data[:2] + struct.pack("!HHHHH", 0x8180 | rcode, 1, 0, 0, 0) + question, addr)
+                    continue
+                tokens -= 1
+
+            if name in self.cnames:
+                target = self.cnames[name]
+                address = self.answer(target)
+                rdata = encode_name(target)
+                records = b"\xc0\x0c" + struct.pack("!HHIH", 5, 1, 60, len(rdata)) + rdata
+                flags, count = 0x8183, 1
+                if address is not None: # the owner of the A record points at the target in the CNAME record
+                    pointer = 0xC000 | (12 + len(question) + 12)
+                    records += struct.pack("!HHHIH", pointer, 1, 1, 60, 4) + address
+                    flags, count = 0x8180, 2
+                self.sock.sendto(data[:2] + struct.pack("!HHHHH", flags, 1, count, 0, 0) + question + records, addr)
+                continue
+
+            address = self.answer(name)
+            if address is None: # NXDOMAIN
+                self.sock.sendto(data[:2] + struct.pack("!HHHHH", 0x8183, 1, 0, 0, 0) + question, addr)
+            else:
+                record = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4) + address
+                self.sock.sendto(data[:2] + struct.pack("!HHHHH", 0x8180, 1, 1, 0, 0) + question + record, addr)
+
+    # Serves from a separate process, so the server does not compete with the resolver for the GIL. Returns "ip:port"
+    def start(self) -> str:
+        context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        self.process = context.Process(target=self.serve_forever, daemon=True)
+        self.process.start()
+        return f"{self.address[0]}:{self.address[1]}"
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub DNS server for trying out and benchmarking the Proteus resolvers")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="set the address to listen on [DEFAULT: 127.0.0.1]")
+    parser.add_argument("--port", type=int, default=5353, help="set the port to listen on [DEFAULT: 5353]")
+    parser.add_argument("--hit-ratio", type=float, default=0.1, help="set the share of names that resolve [DEFAULT: 0.1]")
+    parser.add_argument("--wildcard", type=str, nargs="*", default=[], help="set zones that answer every name below them")
+    parser.add_argument("--throttle-rate", type=float, default=0, help="set the rate above which queries are throttled, 0 disables throttling [DEFAULT: 0]")
+    parser.add_argument("--throttle-mode", type=str, default="refuse", choices=["refuse", "servfail", "drop"], help="set how throttled queries are answered [DEFAULT: refuse]")
+    parser.add_argument("--existing", type=str, default=None, help="set a file of existing domains, which makes the answers follow RFC 8020: nothing exists below a name that does not exist [DEFAULT: disabled]")
+    args = parser.parse_args()
+
+    existing = ()
+    if args.existing is not None:
+        with open(args.existing, "r") as f:
+            existing = tuple(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    server = ProteusStubDNS(args.host, args.port, args.hit_ratio, tuple(args.wildcard), args.throttle_rate, args.throttle_mode, existing)
+    print(f"stub DNS server listening on {server.address[0]}:{server.address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
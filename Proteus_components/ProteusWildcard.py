@@ -0,0 +1,102 @@
+import os
+import random
+import string
+from collections import Counter
+from typing import Iterable, Optional
+
+from ProteusAsyncResolver import ProteusAsyncResolver, ProteusDNSResult
+from ProteusConfig import ProteusConfig
+
+
+class ProteusWildcardDetector:
+    def __init__(self, config: ProteusConfig):
+        self.config = config
+        self.probes_per_zone = 3                    # a zone is a wildcard zone if all random probes resolve
+        self.min_results_per_zone = 3               # after resolving, only zones with at least this many resolved domains are probed
+        self.checked: set[str] = set()              # every zone that has been probed, wildcard or not
+        self.wildcards: dict[str, set[str]] = {}    # wildcard zones along with the answers the wildcard gives
+
+    # The zones candidates are generated under: the domain itself (simple) and every suffix of at least 2 labels (hyphenate, insert, append-hyphenate)
+    @staticmethod
+    def parent_zones(domains: Iterable[str]) -> set[str]:
+        zones = set()
+        for domain in domains:
+            parts = domain.split(".")
+            zones.add(domain)
+            for i in range(1, len(parts) - 1):
+                zones.add(".".join(parts[i:]))
+        return zones
+
+    # Probes every zone that has not been checked before with random labels, and caches the verdict along with the wildcard answers
+    def detect(self, zones: Iterable[str]):
+        zones = [z for z in zones if z not in self.checked]
+        if not zones:
+            return
+
+        probes = {}
+        for zone in zones:
+            for _ in range(self.probes_per_zone):
+                label = "".join(random.choices(string.ascii_lowercase + string.digits, k=16))
+                probes[f"{label}.{zone}"] = zone
+
+        answers: dict[str, list[ProteusDNSResult]] = {}
+        ProteusAsyncResolver(self.config).resolve_names(probes.keys(), lambda r: answers.setdefault(probes[r.name], []).append(r))
+
+        for zone in zones:
+            self.checked.add(zone)
+            results = answers.get(zone, [])
+            if len(results) == self.probes_per_zone and all(r.resolved for r in results):
+                self.wildcards[zone] = {ip for r in results for ip in r.a}
+
+        if not self.config.silent:
+            print(f"probed {len(zones)} zones for wildcard DNS, {len(self.wildcards)} wildcard zone(s) known")
+
+    # Any name below a wildcard zone resolves to the wildcard answers, unless it really exists
+    def is_wildcarded(self, name: str) -> bool:
+        if not self.wildcards:
+            return False
+        return self.wildcard_answers(name) is not None
+
+    def wildcard_answers(self, name: str):
+        answers = None
+        idx = name.find(".")
+        while idx != -1:
+            zone_answers = self.wildcards.get(name[idx + 1:])
+            if zone_answers is not None:
+                answers = zone_answers if answers is None else answers | zone_answers
+            idx = name.find(".", idx + 1)
+        return answers
+
+    # Removes wildcard answers from the resolver output. The parents of resolved domains that have not been probed yet are probed
+    # if enough domains resolved below them, and resolved domains below a wildcard zone are only kept if they resolve to something other than the wildcard answers
+    # Filters the resolver output, or the given file of resolved domains
+    def filter_results(self, path: Optional[str] = None):
+        if path is None:
+            path = self.config.resolverOutput
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            resolved = [line.strip() for line in f if line.strip()]
+
+        parents = Counter(name.split(".", 1)[1] for name in resolved if name.count(".") >= 2)
+        self.detect(zone for zone, count in parents.items() if count >= self.min_results_per_zone)
+        suspects = [name for name in resolved if self.is_wildcarded(name)]
+        if not suspects:
+            return
+
+        removed = set()
+        # only a name that resolves to the wildcard answers again is removed, a failed query (a timeout or SERVFAIL) says nothing about it
+        def check(result: ProteusDNSResult):
+            if result.resolved and set(result.a) <= self.wildcard_answers(result.name):
+                removed.add(result.name)
+        ProteusAsyncResolver(self.config).resolve_names(suspects, check)
+
+        tmp_output = path + ".tmp"
+        with open(tmp_output, "w", buffering=self.config.writeBufferSize) as f:
+            for name in resolved:
+                if name not in removed:
+                    f.write(name + "\n")
+        os.replace(tmp_output, path)
+
+        if not self.config.silent:
+            print(f"removed {len(removed)} wildcard answer(s) from the resolved domains")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import argparse
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+from ProteusAsyncResolver import ProteusDNSResult
+from ProteusConfig import ProteusConfig
+
+
+# Persistent hit rates of the permutator words (SQLite), per word and strategy, learned from the resolver results of every
+# run. Every queried name is an attempt of the word and strategy that generate it (see ProteusPermutator.explain), and
+# every queried name in the final results of the run (after wildcard filtering) is a hit. Names answered by the resolution
+# cache count as neither, and neither do failed queries, as they say nothing about the word.
+# The word and strategy pairs below the hit rate threshold, with enough attempts to tell, are trimmed
+class ProteusWordStats:
+    def __init__(self, path: str, explain: Callable[[str], Optional[tuple[str, str, str]]], config: Optional[ProteusConfig] = None):
+        self.config = config
+        self.explain = explain
+        self.attempts = Counter()   # (word, strategy) -> names queried in this run
+        self.hits = Counter()       # (word, strategy) -> names of this run in the final results
+        self.resolved: dict[str, tuple[str, str]] = {}  # resolved names of this run, hits once they are in the final results
+        self.failures = ("TIMEOUT", "SERVFAIL", "REFUSED")
+
+        self.lock = threading.Lock()    # concurrent low-ram cycles share the statistics
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS word_stats (
+                word TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                hits INTEGER NOT NULL,
+                runs INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL,
+                PRIMARY KEY (word, strategy)
+            ) WITHOUT ROWID""")
+        self.db.commit()
+
+    # Counts the attempt of a queried name, can be used as the on_result of a resolver backend
+    def add(self, result: ProteusDNSResult):
+        if result.status in self.failures:
+            return
+        origin = self.explain(result.name)
+        if origin is None:
+            return
+        key = (origin[0], origin[1])
+        with self.lock:
+            self.attempts[key] += 1
+            if result.resolved:
+                self.resolved[result.name] = key
+
+    # Counts the hits among the final results of the run, returns the amount of hits
+    def record_hits(self, names: Iterable[str]) -> int:
+        count = 0
+        with self.lock:
+            for name in names:
+                key = self.resolved.pop(name, None)
+                if key is not None:
+                    self.hits[key] += 1
+                    count += 1
+            self.resolved.clear()
+        return count
+
+    # Adds the attempts and hits of this run to the table
+    def save(self):
+        now = int(time.time())
+        with self.lock:
+            self.db.executemany("""INSERT INTO word_stats (word, strategy, attempts, hits, runs, last_seen) VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT (word, strategy) DO UPDATE SET
+                    attempts = attempts + excluded.attempts,
+                    hits = hits + excluded.hits,
+                    runs = runs + 1,
+                    last_seen = excluded.last_seen""",
+                ((word, strategy, attempts, self.hits[(word, strategy)], now) for (word, strategy), attempts in self.attempts.items()))
+            self.db.commit()
+            self.attempts.clear()
+            self.hits.clear()
+
+    # The words to leave out of every strategy: the pairs with at least min_attempts attempts and a hit rate below rate
+    def trimmed(self, words: Iterable[str], strategies: Iterable[str], rate: float, min_attempts: int) -> dict[str, set[str]]:
+        words = set(words)
+        strategies = set(strategies)
+        trimmed = {}
+        for word, strategy in self.db.execute("SELECT word, strategy FROM word_stats WHERE attempts >= ? AND hits < attempts * ?", (min_attempts, rate)):
+            if word in words and strategy in strategies:
+                trimmed.setdefault(strategy, set()).add(word)
+        return trimmed
+
+    # (word, attempts, hits) over all strategies, best hit rate first (worst first if worst is set)
+    def word_rates(self, min_attempts: int = 0, limit: int = 50, worst: bool = False) -> list[tuple[str, int, int]]:
+        order = "ASC" if worst else "DESC"
+        return self.db.execute(f"""SELECT word, SUM(attempts) AS total, SUM(hits) FROM word_stats GROUP BY word HAVING total >= ? AND total > 0
+            ORDER BY CAST(SUM(hits) AS REAL) / total {order}, total DESC, word LIMIT ?""", (min_attempts, limit)).fetchall()
+
+    # (strategy, attempts, hits) of a single word, or of every word combined if word is not set
+    def strategy_rates(self, word: Optional[str] = None) -> list[tuple[str, int, int]]:
+        if word is None:
+            return self.db.execute("SELECT strategy, SUM(attempts), SUM(hits) FROM word_stats GROUP BY strategy ORDER BY strategy").fetchall()
+        return self.db.execute("SELECT strategy, attempts, hits FROM word_stats WHERE word = ? ORDER BY strategy", (word,)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+def format_rate(attempts: int, hits: int) -> str:
+    return f"{hits}/{attempts} ({hits / attempts:.2%})" if attempts else "0/0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the word hit rates learned by Proteus runs (--word-stats)")
+    parser.add_argument("stats", type=str, help="the word statistics file")
+    parser.add_argument("--word", type=str, default=None, help="show the hit rate of a single word per strategy")
+    parser.add_argument("--strategies", action="store_true", help="show the hit rate per strategy of all words combined")
+    parser.add_argument("--worst", action="store_true", help="list the words with the lowest hit rate first")
+    parser.add_argument("--min-attempts", type=int, default=0, help="only list words with at least this amount of attempts [DEFAULT: 0]")
+    parser.add_argument("--limit", type=int, default=50, help="set the amount of words listed [DEFAULT: 50]")
+    args = parser.parse_args()
+
+    stats = ProteusWordStats(args.stats, lambda name: None)
+    try:
+        if args.word is not None or args.strategies:
+            for strategy, attempts, hits in stats.strategy_rates(args.word):
+                print(f"{strategy} : {format_rate(attempts, hits)}")
+        else:
+            for word, attempts, hits in stats.word_rates(args.min_attempts, args.limit, args.worst):
+                print(f"{word} : {format_rate(attempts, hits)}")
+    finally:
+        stats.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+
+# The components import each other by module name (like Proteus.py running from this directory does), so the directory is
+# put on the import path when Proteus is imported as a package
+_components_dir = os.path.dirname(os.path.abspath(__file__))
+if _components_dir not in sys.path:
+    sys.path.insert(0, _components_dir)
+
+from ProteusAPI import ProteusAPI
+from ProteusAsyncResolver import ProteusDNSResult
+from ProteusConfig import ProteusConfig
+
+_api = None
+
+
+def _default_api() -> ProteusAPI:
+    global _api
+    if _api is None:
+        _api = ProteusAPI()
+    return _api
+
+
+# Shortcuts on a shared ProteusAPI with the default config. Use a ProteusAPI of your own for any other config
+def harvest(domains, max_words=None):
+    return _default_api().harvest(domains, max_words)
+
+
+def permutations(domains, words=None, strategies=None):
+    return _default_api().permutations(domains, words, strategies)
+
+
+def resolve(names, only_resolved=False):
+    return _default_api().resolve(names, only_resolved)
+
+
+__all__ = ["ProteusAPI", "ProteusConfig", "ProteusDNSResult", "harvest", "permutations", "resolve"]
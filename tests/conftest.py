@@ -0,0 +1,33 @@
+import os
+import socket
+import sys
+
+import pytest
+
+# the components import each other by module name, like Proteus.py running from its own directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Proteus_components"))
+
+from ProteusStubDNS import ProteusStubDNS
+
+
+@pytest.fixture
+def stub_dns():
+    servers = []
+
+    def start(**kwargs) -> str:
+        server = ProteusStubDNS("127.0.0.1", 0, **kwargs)
+        servers.append(server)
+        return server.start()
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+# A UDP port on 127.0.0.1 that receives queries but never answers them, so every query sent to it times out
+@pytest.fixture
+def blackhole():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    yield f"127.0.0.1:{sock.getsockname()[1]}"
+    sock.close()
@@ -0,0 +1,111 @@
+import time
+
+from ProteusAsyncResolver import ProteusAsyncResolver
+from ProteusConfig import ProteusConfig
+
+
+def resolver_config(resolvers: list[str], **kwargs) -> ProteusConfig:
+    kwargs.setdefault("rateResolver", -1)
+    kwargs.setdefault("resolverTimeout", 0.5)
+    return ProteusConfig(file="-", silent=True, resolvers=resolvers, **kwargs)
+
+
+def resolve(config: ProteusConfig, names: list[str], resolver: ProteusAsyncResolver = None) -> dict:
+    results = {}
+    (resolver or ProteusAsyncResolver(config)).resolve_names(names, lambda result: results.__setitem__(result.name, result))
+    return results
+
+
+def test_a_records_and_nxdomain(stub_dns):
+    server = stub_dns(hit_ratio=0, existing_domains=("www.example.com",))
+    results = resolve(resolver_config([server]), ["www.example.com", "missing.example.com"])
+
+    assert results["www.example.com"].status == "NOERROR"
+    assert results["www.example.com"].resolved
+    assert len(results["www.example.com"].a) == 1
+    assert results["missing.example.com"].status == "NXDOMAIN"
+    assert not results["missing.example.com"].resolved
+    assert results["missing.example.com"].a == []
+
+
+def test_cname_records(stub_dns):
+    server = stub_dns(hit_ratio=0, existing_domains=("edge.cdn.example.net",),
+                      cnames={"shop.example.com": "edge.cdn.example.net", "old.example.com": "gone.cdn.example.net"})
+    results = resolve(resolver_config([server]), ["shop.example.com", "old.example.com", "edge.cdn.example.net"])
+
+    assert results["shop.example.com"].cname == ["edge.cdn.example.net"]
+    assert results["shop.example.com"].a == results["edge.cdn.example.net"].a
+    assert results["shop.example.com"].resolved
+    # a CNAME to a name that does not exist has no A record, so it does not count as resolved
+    assert results["old.example.com"].cname == ["gone.cdn.example.net"]
+    assert results["old.example.com"].status == "NXDOMAIN"
+    assert not results["old.example.com"].resolved
+
+
+def test_timeout_without_answer(blackhole):
+    config = resolver_config([blackhole], resolverTimeout=0.2, resolverRetries=1)
+    resolver = ProteusAsyncResolver(config)
+    start = time.monotonic()
+    results = resolve(config, ["a.example.com", "b.example.com"], resolver)
+
+    assert {result.status for result in results.values()} == {"TIMEOUT"}
+    assert resolver.stats["queries"] == 4   # every name is tried once more
+    assert resolver.stats["timeouts"] == 4
+    assert resolver.stats["retries"] == 2
+    assert time.monotonic() - start < 2     # the names time out concurrently
+
+
+def test_retry_on_another_resolver(stub_dns, blackhole):
+    server = stub_dns(hit_ratio=0, existing_domains=("www.example.com",))
+    # the pool is used round-robin, so the first query goes to the resolver that never answers and the retry to the stub
+    config = resolver_config([blackhole, server], resolverTimeout=0.2, resolverRetries=1)
+    resolver = ProteusAsyncResolver(config)
+    results = resolve(config, ["www.example.com"], resolver)
+
+    assert results["www.example.com"].resolved
+    assert resolver.stats["timeouts"] == 1
+    assert resolver.stats["retries"] == 1
+
+
+def test_no_retry_after_the_last_attempt(blackhole):
+    config = resolver_config([blackhole], resolverTimeout=0.2, resolverRetries=0)
+    resolver = ProteusAsyncResolver(config)
+    results = resolve(config, ["a.example.com"], resolver)
+
+    assert results["a.example.com"].status == "TIMEOUT"
+    assert resolver.stats["queries"] == 1
+    assert resolver.stats["retries"] == 0
+
+
+def test_in_flight_window(blackhole):
+    class CountingResolver(ProteusAsyncResolver):
+        in_flight = 0
+        peak = 0
+
+        async def _query(self, name):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                return await super()._query(name)
+            finally:
+                self.in_flight -= 1
+
+    config = resolver_config([blackhole], threadsResolver=5, resolverTimeout=0.2, resolverRetries=0)
+    resolver = CountingResolver(config)
+    start = time.monotonic()
+    results = resolve(config, [f"n{i}.example.com" for i in range(20)], resolver)
+
+    assert len(results) == 20
+    assert resolver.peak == 5
+    # 20 names that all time out, 5 at a time, take 4 timeouts
+    assert time.monotonic() - start >= 4 * 0.2
+
+
+def test_every_name_gets_a_result(stub_dns):
+    server = stub_dns(hit_ratio=0.3)
+    names = [f"host{i}.example.com" for i in range(2000)]
+    results = resolve(resolver_config([server], threadsResolver=50), names)
+
+    assert set(results) == set(names)
+    assert {result.status for result in results.values()} <= {"NOERROR", "NXDOMAIN"}
+    assert 0.2 < sum(result.resolved for result in results.values()) / len(names) < 0.4
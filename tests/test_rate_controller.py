@@ -0,0 +1,81 @@
+import itertools
+import time
+
+import pytest
+
+import ProteusAsyncResolver as async_resolver
+from ProteusAsyncResolver import ProteusAsyncResolver, ProteusRateController, ProteusTokenBucket
+from ProteusConfig import ProteusConfig
+
+
+# Keeps every rate the controller applies, the history of the controller itself only holds the latest intervals
+class RecordingRateController(ProteusRateController):
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.applied = []
+        super().__init__(*args, **kwargs)
+        RecordingRateController.instances.append(self)
+
+    def _apply(self, rate: float):
+        self.applied.append(rate)
+        super()._apply(rate)
+
+
+def test_rate_stays_within_bounds():
+    controller = ProteusRateController(ProteusTokenBucket(80), 50, 100)
+    controller.interval = 0
+
+    for _ in range(50):
+        for _ in range(controller.min_samples):
+            controller.record("REFUSED", time.monotonic())
+    assert controller.rate == 50
+    assert controller.bucket.rate == 50
+
+    for _ in range(100):
+        for _ in range(controller.min_samples):
+            controller.record("NOERROR", time.monotonic())
+    assert controller.rate == 100
+    assert controller.bucket.rate == 100
+
+
+def test_errors_of_queries_sent_before_a_change_are_ignored():
+    controller = ProteusRateController(ProteusTokenBucket(100), 10, 200)
+    controller.interval = 0
+    sent = time.monotonic()
+    for _ in range(controller.min_samples):
+        controller.record("TIMEOUT", sent)
+    assert controller.rate == 75
+    # the timeouts of the same burst arrive after the decision, and do not lower the rate again
+    for _ in range(controller.min_samples * 5):
+        controller.record("TIMEOUT", sent)
+    assert controller.rate == 75
+    assert controller.decreases == 1
+
+
+@pytest.mark.parametrize("mode", ["refuse", "drop"])
+def test_backs_off_under_throttling_and_recovers(stub_dns, monkeypatch, mode):
+    throttle = 200
+    server = stub_dns(hit_ratio=0.3, throttle_rate=throttle, throttle_mode=mode)
+    monkeypatch.setattr(async_resolver, "ProteusRateController", RecordingRateController)
+    RecordingRateController.instances = []
+
+    config = ProteusConfig(file="-", silent=True, resolvers=[server], adaptiveRate=True, rateResolver=500, minRateResolver=50,
+                           maxRateResolver=600, resolverTimeout=0.5, resolverRetries=0, threadsResolver=200)
+    deadline = time.monotonic() + 9
+    names = itertools.takewhile(lambda _: time.monotonic() < deadline, (f"host{i}.example.com" for i in itertools.count()))
+    ProteusAsyncResolver(config).resolve_names(names, lambda result: None)
+
+    controller = RecordingRateController.instances[0]
+    rates = controller.applied
+    assert rates[0] == 500
+    assert all(50 <= rate <= 600 for rate in rates)
+    # the start rate is far above the throttle, so the rate is lowered until it fits below the throttle
+    assert controller.decreases >= 1
+    assert min(rates) < throttle
+    # once below the throttle the errors stop, and the rate is raised again
+    first_decrease = next(i for i in range(1, len(rates)) if rates[i] < rates[i - 1])
+    lowest = rates.index(min(rates))
+    assert lowest > first_decrease
+    assert any(rates[i] > rates[i - 1] for i in range(lowest + 1, len(rates)))
+    assert controller.settled_rate < 500